@@ -1,13 +1,18 @@
 import mmap
 import os
+import platform
 import struct
+import time
 from multiprocessing import shared_memory
 
+import numpy as np
+
 FMT_RGB888 = 0
 VERSION = 1
 
 FB_HDR = struct.Struct("<I H H I I I I I")  # 28 bytes
 SEQ64  = struct.Struct("<Q")
+ACTIVE_STRUCT = struct.Struct("<I")  # active buffer index, header offset 24
 MAGIC  = 0x55434642  # 'UCFB'
 
 FB_SHM_NAME   = os.getenv("PTX_FB_NAME", "ptx_fb")
@@ -20,6 +25,50 @@ REG_HDR = struct.Struct("<I I I")  # magic, version, cam_count
 REG_CAM = struct.Struct("<32s I I I I")  # name[32], index, pixel_count, width, height
 REG_MAGIC = 0x55435247
 
+# GEOM magic doubles as the coordinate-space tag, so the header layout stays the same:
+# legacy producers write 'UCGM' (space unknown, the viewer infers it from the bounds).
+GEOM_MAGIC       = 0x5543474D  # 'UCGM'
+GEOM_MAGIC_PIXEL = 0x55434750  # 'UCGP': xy already in framebuffer pixels, +Y up
+GEOM_MAGIC_WORLD = 0x55434757  # 'UCGW': xy in world units, fit to the frame
+GEOM_COORD_SPACES = {GEOM_MAGIC: None, GEOM_MAGIC_PIXEL: "pixel", GEOM_MAGIC_WORLD: "world"}
+
+# seq-wait backoff: tight re-reads, then yield the core, then short sleeps
+SPIN_TIGHT = 8
+SPIN_YIELD = 16
+SPIN_SLEEP_S = 5e-5
+
+# Seqlock reads (s1, check odd, s2, compare) need no sleep in between. The FB seq words sit
+# at 28 + i * (8 + h * stride), so they are only 4-byte aligned and a single load may tear;
+# a torn value just fails the odd check or the s1 == s2 re-check and the read retries, so
+# consistency comes from the seqlock re-check, not from the load itself. Weakly ordered
+# CPUs (ARM) get a sched_yield between the two reads as a barrier.
+_WEAK_ORDERING = platform.machine().lower().startswith(("arm", "aarch64"))
+
+def _backoff(spins):
+    if spins < SPIN_TIGHT:
+        return
+    if spins < SPIN_TIGHT + SPIN_YIELD:
+        os.sched_yield()
+    else:
+        time.sleep(SPIN_SLEEP_S)
+
+def _map_readonly(path):
+    """Open and map a /dev/shm file read-only with page tables pre-faulted. Returns (fd, mm)."""
+    fd = os.open(path, os.O_RDONLY | getattr(os, "O_CLOEXEC", 0))
+    try:
+        size = os.fstat(fd).st_size
+        flags = mmap.MAP_SHARED | getattr(mmap, "MAP_POPULATE", 0)
+        mm = mmap.mmap(fd, size, flags=flags, prot=mmap.PROT_READ)
+    except Exception:
+        os.close(fd)
+        raise
+    try:
+        mm.madvise(mmap.MADV_WILLNEED)
+        mm.madvise(mmap.MADV_SEQUENTIAL)
+    except (AttributeError, OSError):
+        pass  # madvise unavailable or refused; only a hint
+    return fd, mm
+
 class RegistryReader:
     def __init__(self, name="/ptx_reg"):
         self.name = name
@@ -38,10 +87,13 @@ class RegistryReader:
         if magic != REG_MAGIC: return []
         cams = []
         off = REG_HDR.size
+        rec_size = REG_CAM.size
+        unpack_cam = REG_CAM.unpack_from
         for _ in range(count):
-            name_b, idx, N, W, H = REG_CAM.unpack_from(self.mm, off)
-            off += REG_CAM.size
-            name = name_b.split(b'\x00',1)[0].decode('utf-8', 'ignore')
+            name_b, idx, N, W, H = unpack_cam(self.mm, off)
+            off += rec_size
+            end = name_b.find(b'\x00')
+            name = (name_b[:end] if end >= 0 else name_b).decode('utf-8', 'ignore')
             cams.append({"name": name, "index": idx, "count": N, "width": W, "height": H})
         return cams
 
@@ -62,16 +114,20 @@ class FrameShmReader:
         self.header_size = FB_HDR.size     # 28
         self.onebuf_size = 0
         self._last_seq = 0
+        self._mv = None
+        self._payload_len = 0
+        self._payload_offs = []
+        self._u8 = None
+        self._rgb_rows = []
+        self._active_word = None
+        self._seq_words = []
 
     def _path(self):
         # mmap by filesystem path
         return f"/dev/shm{self.name}" if self.name.startswith("/") else f"/dev/shm/{self.name}"
 
     def connect(self):
-        path = self._path()
-        self.fd = os.open(path, os.O_RDONLY)
-        st = os.fstat(self.fd)
-        self.mm = mmap.mmap(self.fd, st.st_size, mmap.MAP_SHARED, mmap.PROT_READ)
+        self.fd, self.mm = _map_readonly(self._path())
 
         header = self.mm[:self.header_size]
         (magic, ver, fmt, w, h, stride, bufcnt, active) = FB_HDR.unpack(header)
@@ -80,17 +136,32 @@ class FrameShmReader:
         self.width = w; self.height = h; self.stride = stride; self.bufcnt = bufcnt
         self.onebuf_size = 8 + (h * stride)  # 8 = seq
 
+        # one long-lived view over the mapping; hot paths hand out slices of it
+        self._mv = memoryview(self.mm)
+        self._payload_len = h * stride
+        self._payload_offs = [self._buf_base(i) + 8 for i in range(bufcnt)]
+
+        # one uint8 array over the whole mapping; the payloads are read from slices of it
+        # as packed per-point RGB triples (N, 3), for splatting (no copy)
+        self._u8 = np.frombuffer(self.mm, dtype=np.uint8)
+        rows = self._payload_len // 3
+        self._rgb_rows = [self._u8[off: off + rows * 3].reshape(rows, 3) for off in self._payload_offs]
+
+        # scalar views for the hot reads; .item(0) is a single load, no Struct dispatch
+        self._active_word = self._u8[24:28].view(np.uint32)
+        self._seq_words = [self._u8[off - 8: off].view(np.uint64) for off in self._payload_offs]
+
     def _buf_base(self, idx):
         return self.header_size + idx * self.onebuf_size
 
-    def latest_frame_view(self, max_spins=64, sleep_ns=0):
+    def latest_frame_view(self, max_spins=64):
         """Return (memoryview, seq) or (None, last_seq). Non-blocking-ish with small bounded spin."""
         if self.mm is None:
             return (None, self._last_seq)
 
         # active_index is the last uint32 in header at offset 24
-        active = struct.unpack_from("<I", self.mm, 24)[0]
-        base   = self._buf_base(active)
+        active = ACTIVE_STRUCT.unpack_from(self.mm, 24)[0]
+        base   = self._payload_offs[active] - 8
 
         def read_seq():
             return SEQ64.unpack_from(self.mm, base)[0]
@@ -99,16 +170,15 @@ class FrameShmReader:
         while spins < max_spins:
             s1 = read_seq()
             if (s1 & 1) == 1:  # odd => ready
-                if sleep_ns: time.sleep(sleep_ns * 1e-9)
+                if _WEAK_ORDERING: os.sched_yield()
                 s2 = read_seq()
                 if s1 == s2:
                     payload_off = base + 8
-                    payload_len = self.height * self.stride
-                    mv = memoryview(self.mm)[payload_off: payload_off + payload_len]
+                    mv = self._mv[payload_off: payload_off + self._payload_len]
                     self._last_seq = s1
                     return (mv, s1)
             spins += 1
-            if sleep_ns: time.sleep(sleep_ns * 1e-9)
+            _backoff(spins)
 
         return (None, self._last_seq)
     
@@ -118,26 +188,47 @@ class FrameShmReader:
             return (None, self._last_seq)
 
         # active_index is the last uint32 in the 28-byte header -> offset 24
-        active_idx = struct.unpack_from("<I", self.mm, 24)[0]
-        base = self.header_size + active_idx * self.onebuf_size
+        active_idx = self._active_word.item(0)
+        payload_off = self._payload_offs[active_idx]
 
-        # seq at start of buffer
-        seq = struct.unpack_from("<Q", self.mm, base)[0]
+        # seq sits just before the payload
+        seq = self._seq_words[active_idx].item(0)
         if (seq & 1) == 0:  # even = writer in progress
             return (None, self._last_seq)
 
-        payload_off = base + 8
-        payload_len = self.height * self.stride
-        mv = memoryview(self.mm)[payload_off: payload_off + payload_len]
+        mv = self._mv[payload_off: payload_off + self._payload_len]
         self._last_seq = seq
         return (mv, seq)
 
+    def latest_rgb_fast(self, count):
+        """Return (rgb (count, 3) uint8 view, seq) immediately or (None, last_seq) if not ready
+        or the payload holds fewer than count triples. Slices a cached array; no frombuffer."""
+        if self.mm is None:
+            return (None, self._last_seq)
+
+        active_idx = self._active_word.item(0)
+        seq = self._seq_words[active_idx].item(0)
+        if (seq & 1) == 0:  # even = writer in progress
+            return (None, self._last_seq)
+        rows = self._rgb_rows[active_idx]
+        if rows.shape[0] < count:
+            return (None, self._last_seq)
+
+        self._last_seq = seq
+        return (rows[:count], seq)
+
     def close(self):
         try:
+            self._rgb_rows = []
+            self._active_word = None
+            self._seq_words = []
+            self._u8 = None
+            if self._mv is not None: self._mv.release()
             if self.mm: self.mm.close()
             if self.fd is not None:
                 os.close(self.fd)
         finally:
+            self._mv = None
             self.mm = None
             self.fd = None
 
@@ -156,23 +247,27 @@ class CtrlShmWriter:
         self.cam_look = [0.0,0.0,-1.0]
         self.cam_up = [0.0,1.0,0.0]
         self.debug_flags = 0
+        self._pack_into = None
 
     def connect(self):
         self.shm = shared_memory.SharedMemory(name=self.name)
+        self._pack_into = self.CTRL_STRUCT.pack_into
 
     def write(self):
         self.seq += 1
-        buf = self.CTRL_STRUCT.pack(
+        # pack straight into the shared buffer, no intermediate bytes
+        self._pack_into(
+            self.shm.buf, 0,
             self.seq, self.pause, self.dt_scale,
             *self.cam_pos, *self.cam_look, *self.cam_up,
             self.debug_flags
         )
-        self.shm.buf[:self.CTRL_STRUCT.size] = buf
 
     def close(self):
         if self.shm:
             self.shm.close()
             self.shm = None
+            self._pack_into = None
 
 class GeoShmReader:
     def __init__(self, name="/ptx_geom"):
@@ -182,44 +277,54 @@ class GeoShmReader:
         self.count = 0
         self.width = 0
         self.height = 0
+        self.coord_space = None     # "pixel" / "world", or None if the producer doesn't say
         self._last_seq = 0
         self._hdr_size = 24         # magic(4)+count(4)+width(4)+height(4)+seq(8)
+        self._mv = None
+        self._payload_slice_end = 0
+        self._seq_word = None
+        self._xy = None
 
     def connect(self):
         # open under /dev/shm
-        path = f"/dev/shm{self.name}"
-        self.fd = os.open(path, os.O_RDONLY)
-        st = os.fstat(self.fd)
-        self.mm = mmap.mmap(self.fd, st.st_size, mmap.MAP_SHARED, mmap.PROT_READ)
+        self.fd, self.mm = _map_readonly(f"/dev/shm{self.name}")
 
         magic, count, width, height = struct.unpack_from("<IIII", self.mm, 0)
-        if magic != 0x5543474D:  # 'UCGM'
+        if magic not in GEOM_COORD_SPACES:
             raise RuntimeError(f"Bad GEOM magic: 0x{magic:08X}")
+        self.coord_space = GEOM_COORD_SPACES[magic]
         self.count  = count
         self.width  = width
         self.height = height
 
-    def latest(self, max_spins=200, sleep_ns=0):
+        self._mv = memoryview(self.mm)
+        self._payload_slice_end = self._hdr_size + count * 8
+        self._seq_word = np.frombuffer(self.mm, dtype=np.uint64, count=1, offset=16)
+        # the payload as (count, 2) float32 points; count is fixed for the life of the mapping
+        self._xy = np.frombuffer(self.mm, dtype=np.float32, count=count * 2,
+                                 offset=self._hdr_size).reshape(count, 2)
+
+    def latest(self, max_spins=200):
         if self.mm is None:
             return (None, None, self._last_seq)
 
         def _seq():
             # seq at offset 16 (after 4*4 bytes)
-            return struct.unpack_from("<Q", self.mm, 16)[0]
+            return SEQ64.unpack_from(self.mm, 16)[0]
 
         spins = 0
         while spins < max_spins:
             s1 = _seq()
             if (s1 & 1) == 1:                 # odd = ready
-                if sleep_ns: time.sleep(sleep_ns * 1e-9)
+                if _WEAK_ORDERING: os.sched_yield()
                 s2 = _seq()
                 if s1 == s2:                  # stable
-                    payload = memoryview(self.mm)[self._hdr_size : self._hdr_size + self.count * 8]
+                    payload = self._mv[self._hdr_size : self._payload_slice_end]
                     self._last_seq = s1
                     meta = {"count": self.count, "width": self.width, "height": self.height}
                     return (payload, meta, s1)
             spins += 1
-            if sleep_ns: time.sleep(sleep_ns * 1e-9)
+            _backoff(spins)
 
         return (None, None, self._last_seq)
     
@@ -228,21 +333,40 @@ class GeoShmReader:
         if self.mm is None:
             return (None, None, self._last_seq)
 
-        seq = struct.unpack_from("<Q", self.mm, 16)[0]
+        seq = self._seq_word.item(0)
         if (seq & 1) == 0:                   # even = writer in progress
             return (None, None, self._last_seq)
 
-        payload = memoryview(self.mm)[self._hdr_size : self._hdr_size + self.count * 8]
+        payload = self._mv[self._hdr_size : self._payload_slice_end]
         self._last_seq = seq
         meta = {"count": self.count, "width": self.width, "height": self.height}
         return (payload, meta, seq)
+
+    def latest_xy_fast(self):
+        """Return (xy (count, 2) float32 view, meta, seq) immediately or (None, None, last_seq).
+        The array is created once at connect(); this only checks the seq."""
+        if self.mm is None:
+            return (None, None, self._last_seq)
+
+        seq = self._seq_word.item(0)
+        if (seq & 1) == 0:                   # even = writer in progress
+            return (None, None, self._last_seq)
+
+        self._last_seq = seq
+        meta = {"count": self.count, "width": self.width, "height": self.height}
+        return (self._xy, meta, seq)
     
     def close(self):
         try:
+            self._seq_word = None
+            self._xy = None
+            if self._mv is not None:
+                self._mv.release()
             if self.mm:
                 self.mm.close()
             if self.fd is not None:
                 os.close(self.fd)
         finally:
+            self._mv = None
             self.mm = None
             self.fd = None
@@ -9,6 +9,9 @@ if __name__ == "__main__":
     fmt.setRenderableType(QSurfaceFormat.RenderableType.OpenGL)
     fmt.setProfile(QSurfaceFormat.OpenGLContextProfile.CoreProfile)
     fmt.setVersion(3, 3)
+    fmt.setDepthBufferSize(24)
+    # 1 is already Qt's default; restated because the 16 ms animation timer relies on vsync pacing
+    fmt.setSwapInterval(1)
     QSurfaceFormat.setDefaultFormat(fmt)
     
     app = QApplication(sys.argv)
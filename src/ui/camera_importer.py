@@ -1,7 +1,20 @@
 import os
+import numpy as np
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QFormLayout, QLineEdit, 
                                QPushButton, QLabel, QFileDialog, QMessageBox)
 
+def load_camera_coords(path):
+    """Reads the x, y columns of a camera CSV (designator, x, y, ...) as an (N, 2) float array.
+
+    Rows with fewer than three fields (blank lines, stray notes) are skipped. Designators are
+    taken verbatim, so a '#' in one does not start a comment.
+    """
+    with open(path, 'r') as infile:
+        lines = [line for line in infile if len(line.split(",")) >= 3]
+    if not lines:
+        return np.empty((0, 2))
+    return np.loadtxt(lines, delimiter=",", usecols=(1, 2), ndmin=2, comments=None)
+
 class CameraPanel(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -73,25 +86,21 @@ class CameraPanel(QWidget):
             return
 
         try:
-            with open(self.input_file_path, 'r') as infile:
-                lines = infile.read().splitlines()
-
-            x_coords, y_coords = [], []
-            for line in lines:
-                parts = line.split(",")
-                if len(parts) >= 3:
-                    x_coords.append(float(parts[1]))
-                    y_coords.append(float(parts[2]))
+            coords = load_camera_coords(self.input_file_path)
+            x_coords = coords[:, 0].tolist()
+            y_coords = coords[:, 1].tolist()
 
             # --- Generate C++ Code ---
+            rows = [f"\tVector2D({x:.2f}f, {y:.2f}f)" for x, y in zip(x_coords, y_coords)]
+            parts = [
+                "#pragma once\n\n",
+                f"// Generated from: {os.path.basename(self.input_file_path)}\n\n",
+                f"Vector2D {variable_name}[{len(rows)}] = {{\n",
+                ",\n".join(rows),
+                "\n};\n",
+            ]
             with open(self.output_file_path, "w") as outfile:
-                outfile.write("#pragma once\n\n")
-                outfile.write(f"// Generated from: {os.path.basename(self.input_file_path)}\n\n")
-                outfile.write(f"Vector2D {variable_name}[{len(x_coords)}] = {{\n")
-
-                for i in range(len(x_coords)):
-                    line_end = "),\n" if i < len(x_coords) - 1 else ")\n}};\n"
-                    outfile.write(f"\tVector2D({x_coords[i]:.2f}f, {y_coords[i]:.2f}f{line_end}")
+                outfile.write("".join(parts))
             
             QMessageBox.information(self, "Success", f"Successfully generated {os.path.basename(self.output_file_path)}.")
 
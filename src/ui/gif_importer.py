@@ -1,12 +1,60 @@
 # src/ui/gif_converter_panel.py
+import io
+import mmap
 import os
+from contextlib import contextmanager
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QFormLayout, QLineEdit, 
                                QPushButton, QLabel, QFileDialog, QMessageBox, QSplitter)
-from PyQt6.QtGui import QMovie
+from PyQt6.QtGui import QMovie, QImageReader, QPixmap
 from PyQt6.QtCore import Qt
 from PyQt6.Qsci import QsciScintilla, QsciLexerCPP
 from PyQt6.QtGui import QFont, QColor
 
+# byte -> "0xNN" lookup, built once
+_HEX_LUT = tuple("0x%02x" % i for i in range(256))
+
+HEX_COLS = 12
+EMIT_CHUNK = HEX_COLS * 341       # ~4 KB, whole rows so chunks join cleanly
+PREVIEW_MAX_BYTES = 64 * 1024     # editor preview is capped; "Save Header" writes everything
+
+def _emit_hex(out_fp, data, cols=HEX_COLS):
+    """Writes data as rows of `cols` comma-separated 0xNN values, one chunk at a time."""
+    sep = ",\n    "
+    with memoryview(data) as mv:
+        for start in range(0, len(mv), EMIT_CHUNK):
+            with mv[start:start + EMIT_CHUNK] as chunk:
+                hex_values = [_HEX_LUT[byte] for byte in chunk]
+            rows = [", ".join(hex_values[i:i + cols]) for i in range(0, len(hex_values), cols)]
+            if start:
+                out_fp.write(sep)
+            out_fp.write(sep.join(rows))
+
+@contextmanager
+def _mapped_file(path):
+    """Yields the file's contents as a read-only mmap (b"" for empty files), bypassing buffered I/O."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        size = os.fstat(fd).st_size
+        if size == 0:
+            yield b""
+            return
+        mm = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+        try:
+            yield mm
+        finally:
+            mm.close()
+    finally:
+        os.close(fd)
+
+def write_gif_header(out_fp, data, variable_name, source_name):
+    """Writes the complete C++ header for a GIF byte array to out_fp."""
+    out_fp.write(f"// Generated from: {source_name}\n")
+    out_fp.write("#pragma once\n\n")
+    out_fp.write(f"const unsigned char {variable_name}[] = {{\n    ")
+    _emit_hex(out_fp, data)
+    out_fp.write("\n};")
+    out_fp.write(f"\n\nconst int {variable_name}_len = {len(data)};")
+
 class GifPanel(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -30,6 +78,7 @@ class GifPanel(QWidget):
         self.select_input_button = QPushButton("Select Input GIF...")
         self.convert_button = QPushButton("Convert to C++ Header")
         self.convert_button.setStyleSheet("background-color: #007ACC; color: white; padding: 5px;")
+        self.save_button = QPushButton("Save Header As...")
 
         top_form_layout.addRow("C++ Variable Name:", self.name_input)
         top_form_layout.addRow("Input GIF File:", self.select_input_button)
@@ -40,10 +89,15 @@ class GifPanel(QWidget):
         self.gif_preview_label.setMinimumSize(200, 200)
         self.gif_preview_label.setStyleSheet("background-color: #1E1E1E; border: 1px solid #555;")
         self.movie = None
+        self.play_button = QPushButton("Play Preview")
+        self.play_button.setCheckable(True)
+        self.play_button.setEnabled(False)
 
         left_layout.addLayout(top_form_layout)
         left_layout.addWidget(self.gif_preview_label, 1)
+        left_layout.addWidget(self.play_button)
         left_layout.addWidget(self.convert_button)
+        left_layout.addWidget(self.save_button)
 
         # Right side (C++ code output)
         self.code_output = QsciScintilla()
@@ -59,6 +113,8 @@ class GifPanel(QWidget):
         # --- Connections ---
         self.select_input_button.clicked.connect(self.select_input_file)
         self.convert_button.clicked.connect(self.perform_conversion)
+        self.save_button.clicked.connect(self.save_header)
+        self.play_button.toggled.connect(self.on_play_toggled)
 
     def setup_code_editor(self):
         """Configures the QScintilla widget for read-only C++ display."""
@@ -69,7 +125,7 @@ class GifPanel(QWidget):
         self.code_output.setMarginsBackgroundColor(QColor("#333333"))
 
     def select_input_file(self):
-        """Opens a dialog to select the input GIF file and starts the preview."""
+        """Opens a dialog to select the input GIF file and shows its first frame."""
         file_path, _ = QFileDialog.getOpenFileName(self, "Select Input GIF", "", "GIF Files (*.gif)")
         if file_path:
             self.input_file_path = file_path
@@ -77,45 +133,87 @@ class GifPanel(QWidget):
             # Stop any previous animation
             if self.movie:
                 self.movie.stop()
-
-            self.movie = QMovie(self.input_file_path)
+                self.movie = None
+
+            self.play_button.setChecked(False)
+            self.play_button.setEnabled(True)
+            self.show_first_frame()
+
+    def show_first_frame(self):
+        """Decodes only the first frame, at preview resolution, as a static pixmap."""
+        reader = QImageReader(self.input_file_path)
+        size = reader.size()
+        if size.isValid():
+            reader.setScaledSize(size.scaled(self.gif_preview_label.size(), Qt.AspectRatioMode.KeepAspectRatio))
+        image = reader.read()
+        if image.isNull():
+            self.gif_preview_label.setText(f"Error: {reader.errorString()}")
+            return
+        self.gif_preview_label.setPixmap(QPixmap.fromImage(image))
+
+    def on_play_toggled(self, checked):
+        """Runs the animated preview only while the user asks for it."""
+        if checked:
+            self.play_button.setText("Stop Preview")
+            if self.movie is None:
+                self.movie = QMovie(self.input_file_path)
             self.gif_preview_label.setMovie(self.movie)
             self.movie.start()
+        else:
+            self.play_button.setText("Play Preview")
+            if self.movie:
+                self.movie.stop()
+            if self.input_file_path:
+                self.show_first_frame()
 
-    def perform_conversion(self):
-        """Reads the GIF data and generates the C++ byte array."""
-        variable_name = self.name_input.text()
-        
-        if not variable_name:
+    def _validate_inputs(self):
+        if not self.name_input.text():
             QMessageBox.warning(self, "Input Error", "Please enter a C++ variable name.")
-            return
+            return False
         if not self.input_file_path:
             QMessageBox.warning(self, "Input Error", "Please select an input GIF file.")
+            return False
+        return True
+
+    def perform_conversion(self):
+        """Reads the GIF data and previews the C++ byte array in the editor."""
+        if not self._validate_inputs():
             return
+        variable_name = self.name_input.text()
 
         try:
-            with open(self.input_file_path, 'rb') as f:
-                gif_data = f.read()
-
             # --- Generate C++ Code ---
-            hex_values = [f"0x{byte:02x}" for byte in gif_data]
-            
-            cpp_code = f"// Generated from: {os.path.basename(self.input_file_path)}\n"
-            cpp_code += "#pragma once\n\n"
-            cpp_code += f"const unsigned char {variable_name}[] = {{\n    "
-            
-            # Format into lines of 12 bytes for readability
-            for i, hex_val in enumerate(hex_values):
-                cpp_code += hex_val + ", "
-                if (i + 1) % 12 == 0:
-                    cpp_code += "\n    "
-            
-            cpp_code = cpp_code.rstrip(", \n    ") + "\n};"
-            cpp_code += f"\n\nconst int {variable_name}_len = {len(gif_data)};"
-
-            self.code_output.setText(cpp_code)
+            out = io.StringIO()
+            with _mapped_file(self.input_file_path) as gif_data:
+                write_gif_header(out, gif_data[:PREVIEW_MAX_BYTES], variable_name,
+                                 os.path.basename(self.input_file_path))
+                if len(gif_data) > PREVIEW_MAX_BYTES:
+                    out.write(f"\n\n// Preview truncated to the first {PREVIEW_MAX_BYTES} of {len(gif_data)} bytes;"
+                              f" use \"Save Header As...\" for the full array.")
+
+            self.code_output.setText(out.getvalue())
             QMessageBox.information(self, "Success", "GIF data converted successfully.")
 
         except Exception as e:
             QMessageBox.critical(self, "Conversion Error", f"An error occurred: {e}")
             self.code_output.setText(f"// Error: {e}")
+
+    def save_header(self):
+        """Streams the full C++ byte array straight to a .hpp file."""
+        if not self._validate_inputs():
+            return
+        variable_name = self.name_input.text()
+
+        file_path, _ = QFileDialog.getSaveFileName(self, "Save Header", "", "C++ Header Files (*.hpp)")
+        if not file_path:
+            return
+
+        try:
+            with _mapped_file(self.input_file_path) as gif_data, open(file_path, "w") as outfile:
+                write_gif_header(outfile, gif_data, variable_name,
+                                 os.path.basename(self.input_file_path))
+
+            QMessageBox.information(self, "Success", f"Successfully generated {os.path.basename(file_path)}.")
+
+        except Exception as e:
+            QMessageBox.critical(self, "Conversion Error", f"An error occurred: {e}")
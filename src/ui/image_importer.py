@@ -1,20 +1,25 @@
 # src/ui/image_converter_panel.py
 import os
+from collections import OrderedDict
+import numpy as np
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QFormLayout, QLineEdit, 
                                QPushButton, QLabel, QFileDialog, QMessageBox, 
                                QSplitter, QSpinBox)
 from PyQt6.QtGui import QPixmap
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer
 from PyQt6.Qsci import QsciScintilla, QsciLexerCPP
 from PyQt6.QtGui import QFont, QColor
 from PIL import Image
 
+QUANT_CACHE_SIZE = 4  # quantized previews kept per panel
+
 class ImagePanel(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         
         self.input_file_path = ""
         self.image_for_conversion = None
+        self._quant_cache = OrderedDict()  # (path, mtime, num_colors) -> quantized "P" image, LRU
 
         main_layout = QVBoxLayout(self)
         top_form_layout = QFormLayout()
@@ -47,7 +52,13 @@ class ImagePanel(QWidget):
         main_layout.addWidget(splitter)
         self.select_input_button.clicked.connect(self.select_input_file)
         self.convert_button.clicked.connect(self.perform_conversion)
-        self.num_colors_input.valueChanged.connect(self.update_preview)
+
+        # debounce spinbox ticks so only the settled value re-quantizes
+        self._preview_timer = QTimer(self)
+        self._preview_timer.setSingleShot(True)
+        self._preview_timer.setInterval(150)
+        self._preview_timer.timeout.connect(self.update_preview)
+        self.num_colors_input.valueChanged.connect(self._schedule_preview)
 
     def setup_code_editor(self):
         lexer = QsciLexerCPP()
@@ -60,16 +71,30 @@ class ImagePanel(QWidget):
         file_path, _ = QFileDialog.getOpenFileName(self, "Select Input Image", "", "Image Files (*.png *.jpg *.bmp)")
         if file_path:
             self.input_file_path = file_path
+            self._quant_cache.clear()
             self.update_preview()
+
+    def _schedule_preview(self):
+        self._preview_timer.start()
             
     def update_preview(self):
         if not self.input_file_path:
             return
         try:
             num_colors = self.num_colors_input.value()
-            image = Image.open(self.input_file_path)
+            key = (self.input_file_path, os.path.getmtime(self.input_file_path), num_colors)
+            quantized = self._quant_cache.get(key)
+            if quantized is None:
+                image = Image.open(self.input_file_path)
+                quantized = image.convert("P", palette=Image.ADAPTIVE, colors=num_colors)
+                self._quant_cache[key] = quantized
+                # keep only a few recent color counts; each entry is a full-size image
+                while len(self._quant_cache) > QUANT_CACHE_SIZE:
+                    self._quant_cache.popitem(last=False)
+            else:
+                self._quant_cache.move_to_end(key)
 
-            self.image_for_conversion = image.convert("P", palette=Image.ADAPTIVE, colors=num_colors)
+            self.image_for_conversion = quantized
             
             image_for_display = self.image_for_conversion.convert("RGBA")
             
@@ -84,6 +109,11 @@ class ImagePanel(QWidget):
             self.image_for_conversion = None
 
     def perform_conversion(self):
+        # a spinbox change may still be waiting on the debounce; convert what the user sees set
+        if self._preview_timer.isActive():
+            self._preview_timer.stop()
+            self.update_preview()
+
         class_name = self.class_name_input.text()
         num_colors = self.num_colors_input.value()
 
@@ -112,11 +142,12 @@ class ImagePanel(QWidget):
             data += "\t\tSetPosition(offset);\n"
             data += "\t}\n}};\n\n"
 
-            pixel_indices = list(image.getdata())
-            pixel_data_str = ", ".join(map(str, pixel_indices))
+            pixel_indices = np.asarray(image, dtype=np.uint8).ravel()
+            pixel_data_str = ", ".join(map(str, pixel_indices.tolist()))
             data += f"const uint8_t {class_name}::rgbMemory[] PROGMEM = {{{pixel_data_str}}};\n\n"
             
-            palette_data_str = ", ".join(map(str, palette[:num_colors * 3]))
+            palette_arr = np.asarray(palette[:num_colors * 3], dtype=np.uint8)
+            palette_data_str = ", ".join(map(str, palette_arr.tolist()))
             data += f"const uint8_t {class_name}::rgbColors[] PROGMEM = {{{palette_data_str}}};\n"
             
             self.code_output.setText(data)
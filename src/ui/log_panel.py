@@ -1,6 +1,12 @@
+from collections import deque
+
+from PyQt6.QtCore import QTimer
 from PyQt6.QtWidgets import QTextEdit
 
 class LogPanel(QTextEdit):
+    MAX_LINES = 5000
+    FLUSH_MS = 16
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setReadOnly(True)
@@ -11,7 +17,26 @@ class LogPanel(QTextEdit):
                 color: #CCCCCC;
             }
         """)
+        self.document().setMaximumBlockCount(self.MAX_LINES)
+
+        # messages are queued and appended in one batch per flush
+        self._pending = deque()
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(self.FLUSH_MS)
+        self._flush_timer.timeout.connect(self._flush)
 
     def log_message(self, message):
         """Public slot to append a message to the log."""
-        self.append(message)
+        self._pending.append(message)
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        text = "\n".join(self._pending)
+        self._pending.clear()
+        self.append(text)
+        bar = self.verticalScrollBar()
+        bar.setValue(bar.maximum())
@@ -1,16 +1,22 @@
 # src/ui/main_window.py
+import importlib
 import os
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QSplitter, 
                                QStackedWidget, QMessageBox, QPushButton)
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QAction
 
-from .viewport import Viewport
 from .log_panel import LogPanel
-from .camera_importer import CameraPanel
-from .gif_importer import GifPanel
-from .image_importer import ImagePanel
-from .obj_importer import ObjPanel
+
+# Panels are built (and their modules imported) the first time their toolbar action fires;
+# the OBJ panel alone drags in pywavefront, PyOpenGL, QScintilla and a GL surface.
+PANELS = {
+    "viewport": (".viewport", "Viewport"),
+    "camera":   (".camera_importer", "CameraPanel"),
+    "gif":      (".gif_importer", "GifPanel"),
+    "image":    (".image_importer", "ImagePanel"),
+    "obj":      (".obj_importer", "ObjPanel"),
+}
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -29,19 +35,11 @@ class MainWindow(QMainWindow):
         self.create_actions()
         self.create_toolbar()
 
-        self.viewport = Viewport()
         self.log_panel = LogPanel()
-        self.camera_panel = CameraPanel()
-        self.gif_panel = GifPanel()
-        self.image_panel = ImagePanel()
-        self.obj_panel = ObjPanel()
 
+        self.panels = {}
         self.panel_stack = QStackedWidget()
-        self.panel_stack.addWidget(self.viewport)
-        self.panel_stack.addWidget(self.camera_panel)
-        self.panel_stack.addWidget(self.gif_panel)
-        self.panel_stack.addWidget(self.image_panel)
-        self.panel_stack.addWidget(self.obj_panel)
+        self.show_panel("viewport")
 
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
@@ -94,6 +92,18 @@ class MainWindow(QMainWindow):
         toolbar.addAction(self.action_image)
         toolbar.addAction(self.action_obj)
 
+    def show_panel(self, name):
+        """Makes the named panel current, constructing it on first use."""
+        panel = self.panels.get(name)
+        if panel is None:
+            module_name, class_name = PANELS[name]
+            module = importlib.import_module(module_name, __package__)
+            panel = getattr(module, class_name)()
+            self.panels[name] = panel
+            self.panel_stack.addWidget(panel)
+        self.panel_stack.setCurrentWidget(panel)
+        return panel
+
     def on_compile(self):
         self.log_panel.log_message("Placeholder: Kicking off build...")
     
@@ -104,25 +114,25 @@ class MainWindow(QMainWindow):
         self.log_panel.log_message("Placeholder: Pausing...")
     
     def on_viewport(self):
-        self.panel_stack.setCurrentIndex(0)
+        self.show_panel("viewport")
         self.log_panel.log_message("Placeholder: Opening viewport...")
     
     def on_camera(self):
-        self.panel_stack.setCurrentIndex(1)
+        self.show_panel("camera")
         self.log_panel.log_message("Placeholder: Opening camera importer...")
     
     def on_fbx(self):
-        self.panel_stack.setCurrentIndex(2)
+        # no FBX panel yet; leave the current page as is
         self.log_panel.log_message("Placeholder: Opening fbx importer...")
     
     def on_gif(self):
-        self.panel_stack.setCurrentIndex(3)
+        self.show_panel("gif")
         self.log_panel.log_message("Placeholder: Opening gif importer...")
     
     def on_image(self):
-        self.panel_stack.setCurrentIndex(4)
+        self.show_panel("image")
         self.log_panel.log_message("Placeholder: Opening image importer...")
     
     def on_obj(self):
-        self.panel_stack.setCurrentIndex(5)
+        self.show_panel("obj")
         self.log_panel.log_message("Placeholder: Opening obj importer...")
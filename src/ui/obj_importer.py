@@ -1,16 +1,18 @@
 # src/ui/obj_converter_panel.py
+import io
 import os
+import numpy as np
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QFormLayout, QLineEdit, 
-                               QPushButton, QFileDialog, QMessageBox, QSplitter)
+                               QPushButton, QFileDialog, QMessageBox, QSplitter,
+                               QProgressBar)
 from PyQt6.QtCore import Qt
 from PyQt6.Qsci import QsciScintilla, QsciLexerCPP
 from PyQt6.QtGui import QFont, QColor
-import pywavefront
 
 from OpenGL.GL import GL_POINTS, GL_TRIANGLES
 
 # Import the new viewer
-from .opengl_viewer import OpenGLViewer
+from .opengl_viewer import OpenGLViewer, load_scene
 
 class ObjPanel(QWidget):
     def __init__(self, parent=None):
@@ -35,17 +37,23 @@ class ObjPanel(QWidget):
         self.toggle_view_button = QPushButton("Switch to Vertex View")
         self.toggle_view_button.setCheckable(True) # Make it a toggle button
         controls_layout.addWidget(self.toggle_view_button)
+        self.loading_bar = QProgressBar()
+        self.loading_bar.setRange(0, 0)  # indeterminate: busy spinner while the model loads
+        self.loading_bar.setVisible(False)
+        controls_layout.addWidget(self.loading_bar)
 
         # Replace the placeholder with our new functional viewer
         self.viewport = OpenGLViewer()
-        self.viewport.setMinimumSize(400, 300)
+        self.viewport_container = QWidget.createWindowContainer(self.viewport)
+        self.viewport_container.setMinimumSize(400, 300)
+        self.viewport_container.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
 
         self.code_output = QsciScintilla()
         self.setup_code_editor()
 
         # --- Assemble Layout ---
         top_splitter.addWidget(controls_panel)
-        top_splitter.addWidget(self.viewport)
+        top_splitter.addWidget(self.viewport_container)
         top_splitter.setSizes([350, 650])
         bottom_splitter.addWidget(top_splitter)
         bottom_splitter.addWidget(self.code_output)
@@ -56,14 +64,20 @@ class ObjPanel(QWidget):
         self.select_obj_button.clicked.connect(self.select_obj_file)
         self.convert_button.clicked.connect(self.perform_conversion)
         self.toggle_view_button.toggled.connect(self.on_toggle_view)
+        self.viewport.model_loaded.connect(self.on_model_load_finished)
+        self.viewport.model_failed.connect(self.on_model_load_finished)
 
     def select_obj_file(self):
         path, _ = QFileDialog.getOpenFileName(self, "Select OBJ File", "", "OBJ Files (*.obj)")
         if path:
             self.obj_file_path = path
-            # When a file is selected, tell the viewport to load it
+            # When a file is selected, tell the viewport to load it (runs on a worker thread)
+            self.loading_bar.setVisible(True)
             self.viewport.load_model(path)
 
+    def on_model_load_finished(self, *_):
+        self.loading_bar.setVisible(False)
+
     def setup_code_editor(self):
         lexer = QsciLexerCPP()
         lexer.setDefaultFont(QFont("Courier New", 10))
@@ -86,8 +100,8 @@ class ObjPanel(QWidget):
             return
 
         try:
-            # PyWavefront automatically finds and parses the .mtl file
-            scene = pywavefront.Wavefront(self.obj_file_path, create_materials=True, parse=True)
+            # PyWavefront automatically finds and parses the .mtl file; reuses the viewer's parse
+            scene = load_scene(self.obj_file_path)
             
             # --- Generate C++ Code ---
             output_code = self._generate_cpp_header(class_name, scene)
@@ -101,13 +115,18 @@ class ObjPanel(QWidget):
 
     def _generate_cpp_header(self, class_name, scene):
         """Generates the entire C++ header file content."""
-        
+        buf = io.StringIO()
+        buf.write(
+            f"#pragma once\n\n"
+            f'#include "Scene/Materials/Static/SimpleMaterial.h"\n'
+            f'#include "Scene/Objects/Object3D.h"\n'
+            f'#include "Renderer/Utils/IndexGroup.h"\n\n'
+            f"class {class_name} {{\nprivate:\n"
+        )
+
         # --- 1. Generate Material Definitions ---
-        material_defs = ""
         material_map = {} # Maps MTL name to C++ variable name
-        material_count = 0
-        
-        for mat_name, material in scene.materials.items():
+        for material_count, (mat_name, material) in enumerate(scene.materials.items()):
             cpp_var_name = f"mat_{material_count}_{mat_name.replace(' ', '_')}"
             material_map[mat_name] = cpp_var_name
             
@@ -116,55 +135,47 @@ class ObjPanel(QWidget):
             g = int(material.diffuse[1] * 255)
             b = int(material.diffuse[2] * 255)
             
-            material_defs += f"\tSimpleMaterial {cpp_var_name} = SimpleMaterial(RGBColor({r}, {g}, {b}));\n"
-            material_count += 1
+            buf.write(f"\tSimpleMaterial {cpp_var_name} = SimpleMaterial(RGBColor({r}, {g}, {b}));\n")
+        buf.write("\n")
             
         # --- 2. Generate Vertex and Index Data ---
         vert_str = ",\n\t\t".join([f"Vector3D({v[0]:.4f}f, {v[1]:.4f}f, {v[2]:.4f}f)" for v in scene.vertices])
-        vertices_def = f"\tVector3D basisVertices[{len(scene.vertices)}] = {{\n\t\t{vert_str}\n\t}};\n\n"
+        buf.write(f"\tVector3D basisVertices[{len(scene.vertices)}] = {{\n\t\t{vert_str}\n\t}};\n\n")
 
         # --- 3. Generate Triangle Groups (one per material) ---
-        triangle_groups = ""
-        object_assignments = ""
+        object_assignments = []
         group_count = 0
         for mat_name, mesh in scene.meshes.items():
             if not mesh.materials: continue
             
             # PyWavefront stores vertices in a flat list: [v1_idx, t1_idx, n1_idx, v2_idx, ...]
             # We need to extract just the vertex indices.
-            vert_indices = mesh.materials[0].vertices[::3]
+            vert_indices = np.asarray(mesh.materials[0].vertices[::3])
             num_faces = len(vert_indices) // 3
+            tris = vert_indices[:num_faces * 3].reshape(-1, 3).tolist()
             
             index_group_name = f"indexGroup_{group_count}"
             triangle_group_name = f"triangleGroup_{group_count}"
             
-            face_str = ",\n\t\t".join([f"IndexGroup({vert_indices[i*3]}, {vert_indices[i*3+1]}, {vert_indices[i*3+2]})" for i in range(num_faces)])
-            triangle_groups += f"\tIndexGroup {index_group_name}[{num_faces}] = {{\n\t\t{face_str}\n\t}};\n"
+            face_str = ",\n\t\t".join(f"IndexGroup({a}, {b}, {c})" for a, b, c in tris)
+            buf.write(f"\tIndexGroup {index_group_name}[{num_faces}] = {{\n\t\t{face_str}\n\t}};\n")
             
             # Link the triangle group to the vertices and material
             cpp_mat_name = material_map.get(mesh.materials[0].name, "simpleMaterial") # Fallback
-            triangle_groups += f"\tTriangleGroup {triangle_group_name} = TriangleGroup(&basisVertices[0], &{index_group_name}[0], {len(scene.vertices)}, {num_faces});\n"
+            buf.write(f"\tTriangleGroup {triangle_group_name} = TriangleGroup(&basisVertices[0], &{index_group_name}[0], {len(scene.vertices)}, {num_faces});\n")
             
             # Create an Object3D for this group
-            object_assignments += f"\tObject3D obj_{group_count} = Object3D(&{triangle_group_name}, &{cpp_mat_name});\n"
+            object_assignments.append(f"\tObject3D obj_{group_count} = Object3D(&{triangle_group_name}, &{cpp_mat_name});\n")
             group_count += 1
 
-        # --- 4. Assemble the Final Class ---
-        header = (
-            f"#pragma once\n\n"
-            f'#include "Scene/Materials/Static/SimpleMaterial.h"\n'
-            f'#include "Scene/Objects/Object3D.h"\n'
-            f'#include "Renderer/Utils/IndexGroup.h"\n\n'
-            f"class {class_name} {{\nprivate:\n"
-        )
-        
-        footer = (
-            "public:\n"
-            f"\t{class_name}() {{}}\n\n"
-            f"\tvoid AddToScene(Scene& scene) {{\n"
-            + "".join([f"\t\tscene.AddObject(&obj_{i});\n" for i in range(group_count)])
-            + "\t}\n};"
-        )
-        
-        return header + material_defs + "\n" + vertices_def + triangle_groups + "\n" + object_assignments + "\n" + footer
-    
\ No newline at end of file
+        buf.write("\n")
+        buf.writelines(object_assignments)
+        buf.write("\n")
+
+        # --- 4. Close the Class ---
+        buf.write("public:\n")
+        buf.write(f"\t{class_name}() {{}}\n\n")
+        buf.write("\tvoid AddToScene(Scene& scene) {\n")
+        buf.writelines(f"\t\tscene.AddObject(&obj_{i});\n" for i in range(group_count))
+        buf.write("\t}\n};")
+        return buf.getvalue()
@@ -1,17 +1,31 @@
 # src/ui/opengl_viewer.py
+import hashlib
+import itertools
+import os
+import re
+import struct
+import threading
 import numpy as np
-from PyQt6.QtOpenGLWidgets import QOpenGLWidget
-from PyQt6.QtCore import Qt, QTimer
-from PyQt6.QtGui import QMouseEvent, QWheelEvent, QMatrix4x4, QSurfaceFormat, QOpenGLContext
+from PyQt6.QtOpenGL import QOpenGLWindow
+from PyQt6.QtCore import QTimer, QObject, QRunnable, QThreadPool, QStandardPaths, pyqtSignal
+from PyQt6.QtGui import QMouseEvent, QWheelEvent, QMatrix4x4, QOpenGLContext
 from OpenGL.GL import *
 import pywavefront
 
+# Interleaved vertex layout: 3xFP32 position, packed 2_10_10_10 normal = 16 bytes.
+# Color is constant per submesh, so it is a uniform rather than a vertex attribute.
+VERTEX_DTYPE = np.dtype([("pos", "<f4", 3), ("nrm", "<u4")])
+
+def pack_normals_2_10_10_10(nrm: np.ndarray) -> np.ndarray:
+    """Packs unit normals (V,3) into GL_INT_2_10_10_10_REV words: signed 10-bit x|y|z, w=0."""
+    q = np.rint(np.clip(nrm, -1.0, 1.0) * 511.0).astype(np.int32) & 0x3FF
+    return (q[:, 0] | (q[:, 1] << 10) | (q[:, 2] << 20)).astype(np.uint32)
+
 # --- GLSL Shader Code (Updated) ---
 VERTEX_SHADER = """
 #version 330 core
 layout (location = 0) in vec3 aPos;
 layout (location = 1) in vec3 aNormal;
-layout (location = 2) in vec3 aColor; // New vertex color attribute
 
 out vec3 FragPos;
 out vec3 Normal;
@@ -20,13 +34,14 @@ out vec3 VertColor; // Pass color to fragment shader
 uniform mat4 model;
 uniform mat4 view;
 uniform mat4 projection;
+uniform vec3 uColor; // per-submesh material color
 
 void main() {
     FragPos = vec3(model * vec4(aPos, 1.0));
     Normal = mat3(transpose(inverse(model))) * aNormal;
     gl_Position = projection * view * vec4(FragPos, 1.0);
     gl_PointSize = 3.0;
-    VertColor = aColor;
+    VertColor = uColor;
 }
 """
 
@@ -65,6 +80,101 @@ void main() {
 """
 
 
+# Last parsed OBJ, keyed by (path, mtime, size). The viewer and the C++ generator both
+# ask for the same file back to back, so one entry is enough to skip the second parse.
+# (PyWavefront's on-disk cache=True is not used: its loader restores only the material
+# vertex streams, not scene.vertices / collected faces, which both consumers need.)
+_scene_cache = {"key": None, "scene": None}
+# The viewer parses on a worker thread; a conversion started mid-load waits here for that
+# parse to land in the cache instead of starting a second one alongside it.
+_scene_lock = threading.Lock()
+
+def load_scene(obj_file_path: str):
+    """Parse an OBJ with faces collected, reusing the last parse if the file is unchanged."""
+    st = os.stat(obj_file_path)
+    key = (os.path.abspath(obj_file_path), st.st_mtime_ns, st.st_size)
+    with _scene_lock:
+        if _scene_cache["key"] != key:
+            _scene_cache["scene"] = pywavefront.Wavefront(
+                obj_file_path,
+                create_materials=True,
+                parse=True,
+                collect_faces=True,   # get indexed faces
+            )
+            _scene_cache["key"] = key
+        return _scene_cache["scene"]
+
+def scene_positions(scene) -> np.ndarray:
+    """scene.vertices as a (V,3) float32 array. The tuples are streamed flat into a
+    preallocated buffer (no per-tuple sequence probing as np.array does); vertex-color
+    OBJs ("v x y z r g b") have wider tuples, of which only xyz is kept."""
+    verts = scene.vertices
+    if not verts:
+        return np.empty((0, 3), dtype=np.float32)
+    width = len(verts[0])
+    flat = np.fromiter(itertools.chain.from_iterable(verts), dtype=np.float32, count=len(verts) * width)
+    return flat.reshape(-1, width)[:, :3]
+
+# Above this size the viewer skips PyWavefront (which builds per-vertex Python lists) and
+# streams only the v/f records straight into numpy, a chunk of lines at a time.
+STREAM_THRESHOLD_BYTES = 256 * 1024 * 1024
+STREAM_CHUNK_BYTES = 16 * 1024 * 1024
+_FACE_ATTR_RE = re.compile(r"/\S*")   # the /vt/vn part of each face corner
+
+def _parse_face_lines(lines, verts_before):
+    """Turns 'f ...' lines into (F,3) zero-based triangles; polygons are fan-triangulated.
+    verts_before[i] is the number of 'v' lines in the file before lines[i]; negative
+    (relative) indices resolve against it, so v/f runs may interleave (multi-object files)."""
+    text = _FACE_ATTR_RE.sub("", "".join(line[2:] for line in lines))
+    idx = np.fromstring(text, dtype=np.int64, sep=" ")
+    all_tris = idx.size == 3 * len(lines)
+    if all_tris:
+        counts = None
+    else:
+        counts = np.array([len(line.split()) - 1 for line in lines], dtype=np.int64)
+    neg = idx < 0
+    if neg.any():
+        base = np.repeat(np.asarray(verts_before, dtype=np.int64), 3 if all_tris else counts)
+        idx = np.where(neg, base + idx, idx - 1)
+    else:
+        idx -= 1
+    if all_tris:
+        return idx.reshape(-1, 3)   # all triangles: the common case
+
+    starts = np.cumsum(counts) - counts
+    ntri = np.maximum(counts - 2, 0)
+    base = np.repeat(starts, ntri)
+    k = np.arange(ntri.sum()) - np.repeat(np.cumsum(ntri) - ntri, ntri)  # 0..ntri-1 per face
+    return np.stack([idx[base], idx[base + k + 1], idx[base + k + 2]], axis=1)
+
+def stream_obj_geometry(obj_file_path: str):
+    """Reads only vertex positions and faces from an OBJ, chunk by chunk, into numpy arrays.
+    Returns (positions (V,3) float32, faces (F,3) uint32). Materials/normals/UVs are ignored."""
+    pos_chunks, face_chunks = [], []
+    n_verts = 0
+    with open(obj_file_path, "r", encoding="utf-8", errors="ignore") as f:
+        while True:
+            lines = f.readlines(STREAM_CHUNK_BYTES)
+            if not lines:
+                break
+            v_lines, f_lines, f_verts_before = [], [], []
+            for line in lines:
+                if line.startswith("v "):
+                    v_lines.append(line)
+                elif line.startswith("f "):
+                    f_lines.append(line)
+                    f_verts_before.append(n_verts + len(v_lines))
+            if v_lines:
+                pos = np.loadtxt(v_lines, usecols=(1, 2, 3), dtype=np.float32, ndmin=2)
+                pos_chunks.append(pos)
+                n_verts += pos.shape[0]
+            if f_lines:
+                face_chunks.append(_parse_face_lines(f_lines, f_verts_before))
+
+    positions = np.concatenate(pos_chunks) if pos_chunks else np.empty((0, 3), np.float32)
+    faces = np.concatenate(face_chunks).astype(np.uint32) if face_chunks else np.empty((0, 3), np.uint32)
+    return positions, faces
+
 def compile_shader(source, shader_type):
     shader = glCreateShader(shader_type)
     glShaderSource(shader, source)
@@ -73,16 +183,123 @@ def compile_shader(source, shader_type):
         raise Exception(f"Shader compilation error: {glGetShaderInfoLog(shader).decode()}")
     return shader
 
-class OpenGLViewer(QOpenGLWidget):
+# Linked program binaries (ARB_get_program_binary, core in GL 4.1 and exposed by most 3.3
+# drivers) are cached on disk so later runs skip the driver's GLSL front end entirely.
+# The key covers the shader sources and the driver identity; a binary the driver rejects
+# (e.g. after a driver update) just falls back to compiling from source.
+_BINARY_FORMAT = struct.Struct("<I")
+
+def _program_cache_path():
+    ident = b"\0".join([
+        VERTEX_SHADER.encode(), FRAGMENT_SHADER.encode(),
+        glGetString(GL_VENDOR) or b"", glGetString(GL_RENDERER) or b"", glGetString(GL_VERSION) or b"",
+    ])
+    cache_dir = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.CacheLocation)
+    if not cache_dir:
+        return None
+    return os.path.join(cache_dir, "shaders", hashlib.sha1(ident).hexdigest() + ".bin")
+
+def _load_program_binary(program, path):
+    """Returns True if the cached binary was accepted and the program is linked."""
+    try:
+        with open(path, "rb") as f:
+            blob = f.read()
+        (binary_format,) = _BINARY_FORMAT.unpack_from(blob)
+        payload = np.frombuffer(blob, dtype=np.uint8, offset=_BINARY_FORMAT.size)
+        glProgramBinary(program, binary_format, payload, payload.size)
+        return bool(glGetProgramiv(program, GL_LINK_STATUS))
+    except Exception:
+        return False  # missing/stale file or no driver support
+
+def _save_program_binary(program, path):
+    try:
+        length = glGetProgramiv(program, GL_PROGRAM_BINARY_LENGTH)
+        if not length:
+            return
+        payload = np.empty(length, dtype=np.uint8)
+        written = np.zeros(1, dtype=np.int32)
+        binary_format = np.zeros(1, dtype=np.uint32)
+        glGetProgramBinary(program, length, written, binary_format, payload)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(_BINARY_FORMAT.pack(int(binary_format[0])))
+            f.write(payload[:int(written[0])].tobytes())
+    except Exception:
+        pass  # caching is best-effort
+
+def build_shader_program():
+    """Links the viewer program, from the on-disk binary cache when the driver accepts it."""
+    program = glCreateProgram()
+    cache_path = _program_cache_path()
+    if cache_path and _load_program_binary(program, cache_path):
+        return program
+
+    vs = compile_shader(VERTEX_SHADER, GL_VERTEX_SHADER)
+    fs = compile_shader(FRAGMENT_SHADER, GL_FRAGMENT_SHADER)
+    glAttachShader(program, vs)
+    glAttachShader(program, fs)
+    try:
+        glProgramParameteri(program, GL_PROGRAM_BINARY_RETRIEVABLE_HINT, GL_TRUE)
+    except Exception:
+        cache_path = None  # no program binary support
+    glLinkProgram(program)
+
+    # Good practice: check link status and print log on failure
+    ok = glGetProgramiv(program, GL_LINK_STATUS)
+    if not ok:
+        log = glGetProgramInfoLog(program).decode()
+        raise RuntimeError(f"Program link failed:\n{log}")
+
+    # the linked program keeps its own copy; the shader objects can go
+    glDetachShader(program, vs)
+    glDetachShader(program, fs)
+    glDeleteShader(vs)
+    glDeleteShader(fs)
+
+    if cache_path:
+        _save_program_binary(program, cache_path)
+    return program
+
+class ObjLoadSignals(QObject):
+    loaded = pyqtSignal(int, object)  # (token, prepared model or None)
+    failed = pyqtSignal(int, str)
+
+class ObjLoadWorker(QRunnable):
+    """Runs the CPU side of a model load (parse, normals, packing) off the UI thread. No GL calls."""
+    def __init__(self, token, prepare, obj_file_path):
+        super().__init__()
+        self.token = token
+        self.prepare = prepare
+        self.obj_file_path = obj_file_path
+        self.signals = ObjLoadSignals()
+
+    def run(self):
+        try:
+            result = self.prepare(self.obj_file_path)
+        except Exception as e:
+            self.signals.failed.emit(self.token, str(e))
+            return
+        self.signals.loaded.emit(self.token, result)
+
+# A QOpenGLWindow rather than a QOpenGLWidget: it renders straight to its own native surface
+# instead of an FBO that Qt composites into the top-level window on every frame. Embed it
+# with QWidget.createWindowContainer(); focus policy and minimum size go on the container.
+class OpenGLViewer(QOpenGLWindow):
+    model_loaded = pyqtSignal()
+    model_failed = pyqtSignal(str)
+
     def __init__(self, parent=None):
-        super().__init__(parent)
-        self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
+        super().__init__(parent=parent)
         
         self.new_model_data = None
         self.model_needs_upload = False
         self.model_vao = None
         self.model_vbo = None
+        self.model_ibo = None
+        self._vbo_size = 0    # bytes currently allocated on the GPU for each buffer
+        self._ibo_size = 0
         self.model_vertex_count = 0
+        self.model_index_count = 0
         self.model_center = np.array([0.0, 0.0, 0.0])
         self.model_scale = 1.0
         self.shader_program = None
@@ -96,6 +313,18 @@ class OpenGLViewer(QOpenGLWidget):
         self.timer.start(16)
         self.render_mode = GL_TRIANGLES # New state for toggling
         self.meshes = [] # Will hold a list of meshes, each with its own data
+        self._load_token = 0      # bumps per load so stale worker results are dropped
+        self._load_worker = None
+
+        # persistent matrices, rebuilt in place only when their inputs change;
+        # the dirty flags say which uniforms paintGL must re-upload
+        self._proj = QMatrix4x4()
+        self._view = QMatrix4x4()
+        self._model = QMatrix4x4()
+        self._proj_dirty = True
+        self._view_dirty = True
+        self._rebuild_view()
+        self.u_projection = self.u_view = self.u_model = self.u_color = -1
 
     def set_render_mode(self, mode):
         """Public method to switch between GL_TRIANGLES and GL_POINTS."""
@@ -116,190 +345,198 @@ class OpenGLViewer(QOpenGLWidget):
 
     def _compute_normals(self, positions: np.ndarray, faces: np.ndarray) -> np.ndarray:
         normals = np.zeros_like(positions, dtype=np.float32)
-        p = positions
-        for i0, i1, i2 in faces:
-            v0, v1, v2 = p[i0], p[i1], p[i2]
-            n = np.cross(v1 - v0, v2 - v0)
-            normals[i0] += n; normals[i1] += n; normals[i2] += n
+        v = positions[faces]                                  # (N,3,3)
+        fn = np.cross(v[:, 1] - v[:, 0], v[:, 2] - v[:, 0])  # (N,3) area-weighted face normals
+        # scatter-add each face normal into its three corners (add.at handles repeated indices)
+        np.add.at(normals, faces[:, 0], fn)
+        np.add.at(normals, faces[:, 1], fn)
+        np.add.at(normals, faces[:, 2], fn)
         lens = np.linalg.norm(normals, axis=1)
         mask = lens > 1e-12
         normals[mask] /= lens[mask][:, None]
         normals[~mask] = np.array([0.0, 0.0, 1.0], dtype=np.float32)
         return normals
 
-    def _build_flat_submesh(self, local_pos: np.ndarray, faces: np.ndarray, color3: tuple[float,float,float]):
-        # faces: (N,3) of local indices
-        tri_pos = local_pos[faces]                    # (N,3,3)
-        v0 = tri_pos[:, 0, :]
-        v1 = tri_pos[:, 1, :]
-        v2 = tri_pos[:, 2, :]
-        n = np.cross(v1 - v0, v2 - v0)                # (N,3)
-        lens = np.linalg.norm(n, axis=1)
-        mask = lens > 1e-12
-        n[mask] /= lens[mask][:, None]
-        n[~mask] = np.array([0,0,1], dtype=np.float32)
-
-        # Repeat each face normal for its 3 vertices
-        tri_nrm = np.repeat(n[:, None, :], 3, axis=1) # (N,3,3)
-
-        tri_col = np.tile(np.array(color3, np.float32), (faces.shape[0]*3, 1))  # (N*3,3)
-
-        # Interleave pos|norm|color
-        pos_flat = tri_pos.reshape(-1, 3).astype(np.float32)
-        nrm_flat = tri_nrm.reshape(-1, 3).astype(np.float32)
-        packed = np.hstack((pos_flat, nrm_flat, tri_col)).astype(np.float32).ravel()
-
-        return {
-            "data": np.ascontiguousarray(packed),
-            "vbo": None, "vao": None, "ibo": None,
-            "vertex_count": pos_flat.shape[0],
-            "index_count": 0,
-            "positions_for_bounds": pos_flat,  # for bounds/centering
-            "flat": True,
-        }
+    def _pack_interleaved(self, pos: np.ndarray, nrm: np.ndarray) -> np.ndarray:
+        """Writes pos|norm straight into one VERTEX_DTYPE buffer, no temporaries."""
+        packed = np.empty(pos.shape[0], dtype=VERTEX_DTYPE)
+        packed["pos"] = pos
+        packed["nrm"] = pack_normals_2_10_10_10(nrm)
+        return packed
 
     def load_model(self, obj_file_path: str):
-        try:
-            scene = pywavefront.Wavefront(
-                obj_file_path,
-                create_materials=True,
-                parse=True,
-                collect_faces=True,   # get indexed faces
-            )
-
-            positions = np.array(scene.vertices, dtype=np.float32).reshape(-1, 3)
-
-            # Collect all faces (material-level and mesh-level) to compute normals
-            all_faces = []
-            for mesh in scene.mesh_list:
-                for m in getattr(mesh, "materials", []):
-                    mf = getattr(m, "faces", None)
-                    if mf: all_faces.extend(mf)
-                mf2 = getattr(mesh, "faces", None)
-                if mf2: all_faces.extend(mf2)
-
-            if not all_faces:
-                print("No faces found in OBJ.")
-                self.meshes = []
-                self.update()
-                return
-
-            all_faces = np.array(all_faces, dtype=np.uint32).reshape(-1, 3)
-            normals = self._compute_normals(positions, all_faces)
-
+        """Starts loading an OBJ on the thread pool; the result is applied in _on_model_loaded."""
+        self._load_token += 1
+        worker = ObjLoadWorker(self._load_token, self._prepare_model, obj_file_path)
+        worker.signals.loaded.connect(self._on_model_loaded)
+        worker.signals.failed.connect(self._on_model_failed)
+        self._load_worker = worker
+        QThreadPool.globalInstance().start(worker)
+
+    def _on_model_loaded(self, token, result):
+        if token != self._load_token:
+            return  # a newer load superseded this one
+        self._load_worker = None
+        if result is None:
+            print("No faces found in OBJ.")
             self.meshes = []
-            debug_idx = 0  # for palette colors
-
-            for mesh in scene.mesh_list:
-                built_any = False
-
-                # Prefer per-material submeshes
-                for m in getattr(mesh, "materials", []):
-                    faces = np.array(getattr(m, "faces", []), dtype=np.uint32).reshape(-1, 3)
-                    if faces.size == 0:
-                        continue
-
-                    used = np.unique(faces.ravel())
-                    g2l = {int(g): i for i, g in enumerate(used)}
-
-                    local_pos = positions[used]
-                    local_nrm = normals[used]
-
-                    # Try MTL diffuse; if missing/white, apply a debug color so you SEE it
-                    diff = tuple(getattr(m, "diffuse", (1.0, 1.0, 1.0)))[:3]
-                    if diff == (1.0, 1.0, 1.0) or any(np.isnan(diff)):
-                        diff = self._palette_color(debug_idx); debug_idx += 1
-
-                    local_col = np.tile(np.array(diff, dtype=np.float32), (local_pos.shape[0], 1))
-                    packed = np.hstack((local_pos, local_nrm, local_col)).astype(np.float32).ravel()
-                    local_idx = np.array([g2l[int(x)] for x in faces.ravel()], dtype=np.uint32)
-
-                    self.meshes.append({
-                        "data": np.ascontiguousarray(packed),
-                        "indices": np.ascontiguousarray(local_idx),
-                        "vbo": None, "vao": None, "ibo": None,
-                        "vertex_count": local_pos.shape[0],
-                        "index_count": local_idx.size,
-                        "positions_for_bounds": local_pos,
-                    })
-                    built_any = True
-
-                # Fallback: one submesh for the whole mesh
-                if not built_any:
-                    faces = np.array(getattr(mesh, "faces", []), dtype=np.uint32).reshape(-1, 3)
-                    if faces.size == 0:
-                        continue
-
-                    used = np.unique(faces.ravel())
-                    g2l = {int(g): i for i, g in enumerate(used)}
-
-                    local_pos = positions[used]
-                    local_nrm = normals[used]
-                    diff = self._palette_color(debug_idx); debug_idx += 1
-                    local_col = np.tile(np.array(diff, dtype=np.float32), (local_pos.shape[0], 1))
-                    packed = np.hstack((local_pos, local_nrm, local_col)).astype(np.float32).ravel()
-                    local_idx = np.array([g2l[int(x)] for x in faces.ravel()], dtype=np.uint32)
-
-                    self.meshes.append({
-                        "data": np.ascontiguousarray(packed),
-                        "indices": np.ascontiguousarray(local_idx),
-                        "vbo": None, "vao": None, "ibo": None,
-                        "vertex_count": local_pos.shape[0],
-                        "index_count": local_idx.size,
-                        "positions_for_bounds": local_pos,
-                    })
-
-            # Bounds / center / scale (for your translate→scale→rotate order)
-            if self.meshes:
-                all_pos = np.concatenate([m["positions_for_bounds"] for m in self.meshes], axis=0)
-                minc, maxc = all_pos.min(axis=0), all_pos.max(axis=0)
-                self.model_center = (minc + maxc) / 2.0
-                size = np.linalg.norm(maxc - minc)
-                self.model_scale = 2.0 / (size if size > 0 else 1.0)
-
+            self.new_model_data = None
+            self.model_index_count = 0
+        else:
+            self.meshes = result["meshes"]
+            self.new_model_data = result
+            self.model_center = result["center"]
+            self.model_scale = result["scale"]
             self.model_needs_upload = True
-            self.update()
+        self.update()
+        self.model_loaded.emit()
 
-        except Exception as e:
-            print(f"Failed to load model (indexed path): {e}")
+    def _on_model_failed(self, token, message):
+        if token != self._load_token:
+            return
+        self._load_worker = None
+        print(f"Failed to load model (indexed path): {message}")
+        self.model_failed.emit(message)
+
+    def _prepare_model(self, obj_file_path: str):
+        """Parses and packs an OBJ into CPU-side mesh dicts. Runs on a worker thread."""
+        if os.path.getsize(obj_file_path) > STREAM_THRESHOLD_BYTES:
+            # too big to materialize as a PyWavefront scene: geometry only, one submesh
+            positions, all_faces = stream_obj_geometry(obj_file_path)
+            groups = [[(all_faces, None)]] if all_faces.size else []
+        else:
+            scene = load_scene(obj_file_path)
+            positions = scene_positions(scene)
+            all_faces, groups = self._scene_face_groups(scene)
+
+        if all_faces.size == 0:
+            return None
+
+        normals = self._compute_normals(positions, all_faces)
+
+        # All meshes are batched into one vertex + one index buffer. Each mesh contributes one
+        # vertex block shared by its material splits (color is a uniform, not per vertex);
+        # indices are rebased onto the concatenated vertices and submeshes sit back to back
+        # in the IBO, so every submesh is a (count, byte offset) range in the one VAO.
+        meshes = []
+        blocks = []
+        index_chunks = []
+        vertex_base = 0
+        index_offset = 0
+        debug_idx = 0  # for palette colors
+        for mesh_groups in groups:
+            # One unique/remap pass per mesh; its material splits slice the shared inverse
+            mesh_faces = np.concatenate([faces for faces, _ in mesh_groups])
+            used, inv = np.unique(mesh_faces.ravel(), return_inverse=True)
+            blocks.append(self._pack_interleaved(positions[used], normals[used]))
+            inv = (inv + vertex_base).astype(np.uint32)
+            start = 0
+            for faces, diff in mesh_groups:
+                stop = start + faces.size
+                # Try MTL diffuse; if missing/white, apply a debug color so you SEE it
+                if diff is None or diff == (1.0, 1.0, 1.0) or any(np.isnan(diff)):
+                    diff = self._palette_color(debug_idx); debug_idx += 1
+                index_chunks.append(inv[start:stop])
+                meshes.append({
+                    "color": tuple(float(c) for c in diff),
+                    "index_count": stop - start,
+                    "index_offset": index_offset,
+                })
+                index_offset += (stop - start) * 4  # uint32
+                start = stop
+            vertex_base += used.size
+
+        if not meshes:
+            return None
+
+        # Bounds / center / scale (for your translate→scale→rotate order)
+        # straight off positions; stray vertices no face uses are masked out so they can't skew framing
+        referenced = np.zeros(positions.shape[0], dtype=bool)
+        referenced[all_faces.ravel()] = True
+        bounds_pos = positions if referenced.all() else positions[referenced]
+        minc, maxc = bounds_pos.min(axis=0), bounds_pos.max(axis=0)
+        center = (minc + maxc) / 2.0
+        size = np.linalg.norm(maxc - minc)
+        scale = 2.0 / (size if size > 0 else 1.0)
+
+        data = np.concatenate(blocks)
+        indices = np.concatenate(index_chunks)
+
+        return {"meshes": meshes, "data": data, "indices": indices, "center": center, "scale": scale}
+
+    def _scene_face_groups(self, scene):
+        """Returns (all_faces, [[(faces, diffuse or None), ...] per mesh]) from a PyWavefront scene.
+        Per-material groups are preferred; a mesh without any falls back to its own faces
+        with diffuse None (always gets a palette color)."""
+        # Each face list is converted to an array once; normals use all of them together
+        face_arrays = []
+        groups = []
+        for mesh in scene.mesh_list:
+            mesh_groups = []
+
+            # Prefer per-material submeshes
+            for m in getattr(mesh, "materials", []):
+                faces = np.array(getattr(m, "faces", None) or [], dtype=np.uint32).reshape(-1, 3)
+                if faces.size == 0:
+                    continue
+                face_arrays.append(faces)
+                mesh_groups.append((faces, tuple(getattr(m, "diffuse", (1.0, 1.0, 1.0)))[:3]))
+
+            faces = np.array(getattr(mesh, "faces", None) or [], dtype=np.uint32).reshape(-1, 3)
+            if faces.size:
+                face_arrays.append(faces)
+                # Fallback: one submesh for the whole mesh
+                if not mesh_groups:
+                    mesh_groups.append((faces, None))
+            if mesh_groups:
+                groups.append(mesh_groups)
+
+        all_faces = np.concatenate(face_arrays) if face_arrays else np.empty((0, 3), np.uint32)
+        return all_faces, groups
+
+    def _upload_buffer(self, target, array, allocated):
+        """Writes array into the bound buffer, reusing the GPU allocation when it fits.
+        Returns the allocation size after the upload."""
+        if 0 < array.nbytes <= allocated:
+            glBufferSubData(target, 0, array.nbytes, array)
+            return allocated
+        glBufferData(target, array.nbytes, array, GL_STATIC_DRAW)
+        return array.nbytes
 
-            
     def _upload_model_to_gpu(self):
-        if not self.meshes:
+        model = self.new_model_data
+        if model is None:
             return
 
-        for mesh in self.meshes:
-            if mesh.get("vao") is None:
-                mesh["vao"] = glGenVertexArrays(1)
-            glBindVertexArray(mesh["vao"])
-
-            # VBO
-            if mesh.get("vbo") is None:
-                mesh["vbo"] = glGenBuffers(1)
-            glBindBuffer(GL_ARRAY_BUFFER, mesh["vbo"])
-            glBufferData(GL_ARRAY_BUFFER, mesh["data"].nbytes, mesh["data"], GL_STATIC_DRAW)
-
-            stride = 9 * 4  # 9 floats * 4 bytes
-            # pos
-            glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(0))
-            glEnableVertexAttribArray(0)
-            # normal
-            glVertexAttribPointer(1, 3, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(12))
-            glEnableVertexAttribArray(1)
-            # color
-            glVertexAttribPointer(2, 3, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(24))
-            glEnableVertexAttribArray(2)
-
-            # IBO/EBO (if present)
-            if "indices" in mesh:
-                if mesh.get("ibo") is None:
-                    mesh["ibo"] = glGenBuffers(1)
-                glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, mesh["ibo"])
-                glBufferData(GL_ELEMENT_ARRAY_BUFFER, mesh["indices"].nbytes, mesh["indices"], GL_STATIC_DRAW)
-
-            # Unbind VAO (keeps element array binding inside VAO state)
-            glBindVertexArray(0)
-
+        if self.model_vao is None:
+            self.model_vao = glGenVertexArrays(1)
+            self.model_vbo = glGenBuffers(1)
+            self.model_ibo = glGenBuffers(1)
+        glBindVertexArray(self.model_vao)
+
+        # VBO
+        glBindBuffer(GL_ARRAY_BUFFER, self.model_vbo)
+        data = model["data"].view(np.uint8)  # raw bytes of the structured buffer
+        self._vbo_size = self._upload_buffer(GL_ARRAY_BUFFER, data, self._vbo_size)
+
+        stride = VERTEX_DTYPE.itemsize  # 16 bytes
+        # pos
+        glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(VERTEX_DTYPE.fields["pos"][1]))
+        glEnableVertexAttribArray(0)
+        # normal: signed normalized 2_10_10_10 (shader reads .xyz)
+        glVertexAttribPointer(1, 4, GL_INT_2_10_10_10_REV, GL_TRUE, stride, ctypes.c_void_p(VERTEX_DTYPE.fields["nrm"][1]))
+        glEnableVertexAttribArray(1)
+
+        # IBO/EBO
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.model_ibo)
+        self._ibo_size = self._upload_buffer(GL_ELEMENT_ARRAY_BUFFER, model["indices"], self._ibo_size)
+
+        # Unbind VAO (keeps element array binding inside VAO state)
+        glBindVertexArray(0)
+
+        self.model_vertex_count = model["data"].shape[0]
+        self.model_index_count = model["indices"].size
+        self.new_model_data = None  # CPU copy no longer needed
         self.model_needs_upload = False
 
 
@@ -315,26 +552,32 @@ class OpenGLViewer(QOpenGLWidget):
             except Exception:
                 pass  # ignore on drivers that don't like it
 
-        vs = compile_shader(VERTEX_SHADER, GL_VERTEX_SHADER)
-        fs = compile_shader(FRAGMENT_SHADER, GL_FRAGMENT_SHADER)
-        self.shader_program = glCreateProgram()
-        glAttachShader(self.shader_program, vs)
-        glAttachShader(self.shader_program, fs)
-        glLinkProgram(self.shader_program)
+        self.shader_program = build_shader_program()
 
-        # Good practice: check link status and print log on failure
-        ok = glGetProgramiv(self.shader_program, GL_LINK_STATUS)
-        if not ok:
-            log = glGetProgramInfoLog(self.shader_program).decode()
-            raise RuntimeError(f"Program link failed:\n{log}")
+        # uniform locations are fixed for the life of the program
+        self.u_projection = glGetUniformLocation(self.shader_program, "projection")
+        self.u_view = glGetUniformLocation(self.shader_program, "view")
+        self.u_model = glGetUniformLocation(self.shader_program, "model")
+        self.u_color = glGetUniformLocation(self.shader_program, "uColor")
 
         glUseProgram(self.shader_program)
         glUniform3f(glGetUniformLocation(self.shader_program, "lightPos1"), 5.0, 5.0, 5.0)
         glUniform3f(glGetUniformLocation(self.shader_program, "lightPos2"), -5.0, 5.0, -5.0)
+        self._proj_dirty = self._view_dirty = True
 
 
     def resizeGL(self, w, h):
         glViewport(0, 0, w, h)
+        self._proj.setToIdentity()
+        self._proj.perspective(45.0, w / h if h > 0 else 0, 0.1, 100.0)
+        self._proj_dirty = True
+
+    def _rebuild_view(self):
+        self._view.setToIdentity()
+        self._view.translate(0.0, 0.0, -self.camera_distance)
+        self._view.rotate(self.camera_elevation, 1.0, 0.0, 0.0)
+        self._view.rotate(self.camera_azimuth, 0.0, 1.0, 0.0)
+        self._view_dirty = True
 
     def paintGL(self):
         glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
@@ -345,43 +588,55 @@ class OpenGLViewer(QOpenGLWidget):
         if not self.shader_program: return
         glUseProgram(self.shader_program)
 
-        projection = QMatrix4x4()
-        projection.perspective(45.0, self.width() / self.height() if self.height() > 0 else 0, 0.1, 100.0)
+        if self._proj_dirty:
+            glUniformMatrix4fv(self.u_projection, 1, GL_FALSE, self._proj.data())
+            self._proj_dirty = False
+        if self._view_dirty:
+            glUniformMatrix4fv(self.u_view, 1, GL_FALSE, self._view.data())
+            self._view_dirty = False
 
-        view = QMatrix4x4()
-        view.translate(0.0, 0.0, -self.camera_distance)
-        view.rotate(self.camera_elevation, 1.0, 0.0, 0.0)
-        view.rotate(self.camera_azimuth, 0.0, 1.0, 0.0)
-
-        model = QMatrix4x4()
+        # model changes every frame (auto-rotate)
+        model = self._model
+        model.setToIdentity()
         model.translate(-self.model_center[0], -self.model_center[1], -self.model_center[2])
         model.scale(self.model_scale)
         model.rotate(self.auto_rotate_angle, 0.0, 1.0, 0.0)
-
-        glUniformMatrix4fv(glGetUniformLocation(self.shader_program, "projection"), 1, GL_FALSE, projection.data())
-        glUniformMatrix4fv(glGetUniformLocation(self.shader_program, "view"), 1, GL_FALSE, view.data())
-        glUniformMatrix4fv(glGetUniformLocation(self.shader_program, "model"), 1, GL_FALSE, model.data())
+        glUniformMatrix4fv(self.u_model, 1, GL_FALSE, model.data())
 
         self._draw_model()
         
     def _draw_model(self):
-        if self.model_needs_upload:
+        if self.model_needs_upload or not self.model_index_count:
             return
 
-        for mesh in self.meshes:
-            glBindVertexArray(mesh["vao"])
-            if mesh.get("ibo") is not None:
-                glDrawElements(self.render_mode, mesh["index_count"], GL_UNSIGNED_INT, ctypes.c_void_p(0))
-            else:
-                glDrawArrays(self.render_mode, 0, mesh["vertex_count"])
-            glBindVertexArray(0)
+        # every submesh lives in the one batched buffer: bind once, then one
+        # color uniform + ranged draw per submesh
+        glBindVertexArray(self.model_vao)
+        for m in self.meshes:
+            glUniform3f(self.u_color, *m["color"])
+            glDrawElements(self.render_mode, m["index_count"], GL_UNSIGNED_INT, ctypes.c_void_p(m["index_offset"]))
+        glBindVertexArray(0)
 
         
     def update_animation(self):
+        # nothing to show: skip the repaint entirely
+        if not self.isExposed():
+            return
         self.auto_rotate_angle += 0.5
         if self.auto_rotate_angle > 360: self.auto_rotate_angle -= 360
         self.update()
 
+    # The animation timer only runs while the viewer is shown; QStackedWidget hides
+    # the OBJ panel (and with it the container window) whenever another page is current.
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not self.timer.isActive():
+            self.timer.start(16)
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
+
     def mousePressEvent(self, event: QMouseEvent):
         self.last_mouse_pos = event.position()
     def mouseMoveEvent(self, event: QMouseEvent):
@@ -392,10 +647,12 @@ class OpenGLViewer(QOpenGLWidget):
             self.camera_elevation += dy * 0.25
             self.camera_elevation = max(-90, min(90, self.camera_elevation))
             self.last_mouse_pos = event.position()
+            self._rebuild_view()
             self.update()
     def mouseReleaseEvent(self, event: QMouseEvent):
         self.last_mouse_pos = None
     def wheelEvent(self, event: QWheelEvent):
         self.camera_distance -= event.angleDelta().y() / 120.0
         self.camera_distance = max(1.0, min(20.0, self.camera_distance))
+        self._rebuild_view()
         self.update()
@@ -1,12 +1,209 @@
-from PyQt6.QtCore import QTimer, Qt, QSize
-from PyQt6.QtGui import QImage, QPixmap
+from PyQt6.QtCore import QTimer, Qt, QSize, QRect, QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt6.QtGui import QImage, QPainter
 from PyQt6.QtWidgets import QWidget, QLabel, QVBoxLayout, QHBoxLayout, QPushButton, QSlider, QFormLayout
 import numpy as np
-import math
+
+try:
+    from numba import njit  # optional: JIT for the splat paint loop
+except ImportError:
+    njit = None
 
 from ipc.shm_protocol import RegistryReader, FrameShmReader, CtrlShmWriter, GeoShmReader
 
 
+_splat_offsets_cache = {}
+
+def _splat_offsets(r, W):
+    """(d, flat) for a (2r+1)^2 square splat in a W-wide image: d is the per-axis offsets
+    -r..r, flat the linear pixel offset dy*W + dx of every cell, row-major like the old loops."""
+    offs = _splat_offsets_cache.get((r, W))
+    if offs is None:
+        d = np.arange(-r, r + 1)
+        offs = (d, (d[:, None] * W + d[None, :]).ravel())
+        _splat_offsets_cache[(r, W)] = offs
+    return offs
+
+def splat_transform(xy, W, H, coord_space=None):
+    """(ax, bx, ay, by) with pixel = rint(x*ax + bx), rint(y*ay + by) for a geometry snapshot.
+    Pixel-space input (+Y up) only flips y; anything else is fit to the frame.
+    Only changes with the geometry, so callers can cache it per geometry seq.
+    coord_space is the producer's declared space ("pixel" skips the bounds scan entirely);
+    None means unknown and the space is inferred from the bounds."""
+    if coord_space == "pixel":
+        return 1.0, 0.0, -1.0, float(H - 1)
+
+    lo = xy.min(axis=0).astype(np.float64)
+    hi = xy.max(axis=0).astype(np.float64)
+    minx, miny = float(lo[0]), float(lo[1])
+    maxx, maxy = float(hi[0]), float(hi[1])
+    # Determine if xy are already in pixel space
+    pixel_space = coord_space is None and (
+        minx >= -0.5 and maxx <= (W - 1 + 0.5) and
+        miny >= -0.5 and maxy <= (H - 1 + 0.5)
+    )
+    if pixel_space:
+        return 1.0, 0.0, -1.0, float(H - 1)
+
+    # Normalize world coords to framebuffer space, folded into scale + offset
+    ax = (W - 1) / max(maxx - minx, 1e-6)
+    ay = -(H - 1) / max(maxy - miny, 1e-6)
+    return ax, -minx * ax, ay, (H - 1) - miny * ay
+
+def splat_points(xy, rgb, W, H, r, transform=None, out=None, depth=None):
+    """Paints each point as a (2r+1)^2 square of its colour into a fresh (H, W) uint32 image
+    of RGBX8888 pixels (one word store per pixel rather than three byte stores).
+    xy are either already pixel coords (+Y up) or world coords, which get fit to the frame.
+    Points are written in order, so where splats overlap the later point wins.
+    transform is splat_transform(xy, W, H) if the caller has it cached; computed here otherwise.
+    out, if given, is a reusable (H, W) uint32 buffer that is cleared and painted in place.
+    depth, if given (one float per point, smaller = nearer), switches overlap resolution
+    from "later point wins" to a z-test. The GEOM stream carries no depth yet."""
+    n = min(xy.shape[0], rgb.shape[0])
+    if n == 0:
+        return None
+    if transform is None:
+        transform = splat_transform(xy, W, H)
+    ax, bx, ay, by = transform
+
+    # round half to even, like round()
+    ix = np.rint(xy[:n, 0].astype(np.float64) * ax + bx)
+    iy = np.rint(xy[:n, 1].astype(np.float64) * ay + by)
+
+    keep = (ix >= 0) & (ix < W) & (iy >= 0) & (iy < H)
+    ix = ix[keep].astype(np.intp)
+    iy = iy[keep].astype(np.intp)
+    colors = rgb[:n][keep].astype(np.uint32)
+    # RGBX8888 is bytes R,G,B,X in memory: as a little-endian word that's R | G<<8 | B<<16
+    words = colors[:, 0] | (colors[:, 1] << 8) | (colors[:, 2] << 16) | np.uint32(0xFF000000)
+
+    if out is None:
+        out = np.empty((H, W), dtype=np.uint32)
+    out.fill(0xFF000000)  # opaque black
+    if depth is None:
+        _paint_splats(out, ix, iy, words, r)
+    else:
+        _paint_splats_depth(out, ix, iy, words, np.asarray(depth, dtype=np.float32)[:n][keep], r)
+    return out
+
+def _splat_cells(ix, iy, H, W, r):
+    """(cells, inside): flat pixel index of every (point, offset) splat cell, point-major,
+    shape (N, (2r+1)^2); inside masks the cells within the frame, None if all of them are."""
+    d, flat = _splat_offsets(r, W)
+    cells = (iy * W + ix)[:, None] + flat
+    # bounds are checked per axis (a flat range check would let splats wrap across rows)
+    xin = (ix[:, None] + d >= 0) & (ix[:, None] + d < W)
+    yin = (iy[:, None] + d >= 0) & (iy[:, None] + d < H)
+    if xin.all() and yin.all():
+        return cells, None
+    return cells, (yin[:, :, None] & xin[:, None, :]).reshape(cells.shape)
+
+def _paint_splats_numpy(out, ix, iy, words, r):
+    H, W = out.shape
+    # point-major cells, so the last write per pixel is the last point
+    cells, inside = _splat_cells(ix, iy, H, W, r)
+    if inside is None:
+        out.reshape(-1)[cells.ravel()] = np.repeat(words, cells.shape[1])
+    else:
+        out.reshape(-1)[cells[inside]] = np.broadcast_to(words[:, None], inside.shape)[inside]
+
+def _paint_splats_depth(out, ix, iy, words, depth, r):
+    # Nearest splat per pixel in one pass, no sort: depth and point index are packed into one
+    # uint64 key (depth << 32 | index), min-reduced per pixel, and the winner's colour gathered.
+    H, W = out.shape
+    n = ix.shape[0]
+    if n == 0:
+        return
+    # float32 -> uint32 whose unsigned order matches the float order (negatives flipped;
+    # + 0.0 folds -0.0 into 0.0 so the two tie like they compare)
+    bits = (depth + np.float32(0.0)).view(np.uint32)
+    zkey = np.where(bits >> 31, ~bits, bits | np.uint32(0x80000000)).astype(np.uint64)
+    keys = (zkey << np.uint64(32)) | np.arange(n, dtype=np.uint64)
+
+    cells, inside = _splat_cells(ix, iy, H, W, r)
+    keys = np.broadcast_to(keys[:, None], cells.shape)
+    if inside is not None:
+        cells, keys = cells[inside], keys[inside]
+    empty = np.uint64(0xFFFFFFFFFFFFFFFF)
+    zbuf = np.full(H * W, empty, dtype=np.uint64)
+    np.minimum.at(zbuf, cells.ravel(), keys.ravel())
+
+    hit = zbuf != empty
+    winner = (zbuf[hit] & np.uint64(0xFFFFFFFF)).astype(np.intp)
+    out.reshape(-1)[hit] = words[winner]
+
+def _paint_splats_loop(out, ix, iy, words, r):
+    # Plain loops for numba to compile. Deliberately serial (no prange): overlapping
+    # splats must resolve in point order, and the whole pass is a few hundred µs anyway.
+    H, W = out.shape
+    for i in range(ix.shape[0]):
+        x0 = max(0, ix[i] - r); x1 = min(W - 1, ix[i] + r)
+        y0 = max(0, iy[i] - r); y1 = min(H - 1, iy[i] + r)
+        c = words[i]
+        for yy in range(y0, y1 + 1):
+            for xx in range(x0, x1 + 1):
+                out[yy, xx] = c
+
+# With an explicit signature numba compiles eagerly when this module is imported (or loads
+# the cached object from __pycache__), so no frame ever waits on the JIT or on type dispatch.
+# splat_points() always passes C-contiguous arrays of exactly these types.
+_PAINT_SPLATS_SIG = "void(uint32[:, ::1], intp[::1], intp[::1], uint32[::1], intp)"
+
+_paint_splats = (njit(_PAINT_SPLATS_SIG, cache=True, fastmath=True, nogil=True)(_paint_splats_loop)
+                 if njit else _paint_splats_numpy)
+
+class SplatSignals(QObject):
+    finished = pyqtSignal(int, int)  # (token, index of the framebuffer that was painted)
+    failed = pyqtSignal(int, str)
+
+class SplatWorker(QRunnable):
+    """Splats one frame into a back framebuffer off the UI thread. Owns copies of the
+    point data, never the SHM views, so the producer and camera switches can't race it."""
+    def __init__(self, token, index, out, xy, rgb, r, transform):
+        super().__init__()
+        self.token = token
+        self.index = index
+        self.out = out
+        self.xy = xy
+        self.rgb = rgb
+        self.r = r
+        self.transform = transform
+        self.signals = SplatSignals()
+
+    def run(self):
+        try:
+            H, W = self.out.shape
+            splat_points(self.xy, self.rgb, W, H, self.r, self.transform, self.out)
+        except Exception as e:
+            self.signals.failed.emit(self.token, str(e))
+            return
+        self.signals.finished.emit(self.token, self.index)
+
+class FrameCanvas(QWidget):
+    """Shows one QImage scaled to fit (aspect kept, centred, nearest-neighbour).
+    The image is drawn straight into the widget at paint time, so a new frame costs
+    no pixmap allocation or upload; only the image the caller keeps updating."""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._image = None
+
+    def set_image(self, image):
+        self._image = image
+        self.update()
+
+    def clear(self):
+        self._image = None
+        self.update()
+
+    def paintEvent(self, event):
+        if self._image is None:
+            return
+        size = self._image.size().scaled(self.size(), Qt.AspectRatioMode.KeepAspectRatio)
+        target = QRect((self.width() - size.width()) // 2, (self.height() - size.height()) // 2,
+                       size.width(), size.height())
+        painter = QPainter(self)  # no SmoothPixmapTransform hint: nearest-neighbour
+        painter.drawImage(target, self._image)
+        painter.end()
+
 class Viewport(QWidget):
     def __init__(self, fb_name=None, ctrl_name=None, geom_name=None, parent=None):
         super().__init__(parent)
@@ -14,8 +211,7 @@ class Viewport(QWidget):
 
         # --- UI ---
         from PyQt6.QtWidgets import QComboBox
-        self.canvas = QLabel()
-        self.canvas.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.canvas = FrameCanvas()
         self.canvas.setMinimumSize(320, 200)
 
         controls = QHBoxLayout()
@@ -44,11 +240,17 @@ class Viewport(QWidget):
 
         self._frame_timer = QTimer(self)
         self._frame_timer.timeout.connect(self._tick)
-        self._frame_timer.start(1000 // 120)
+        self._frame_timer.start(1000 // 60)
 
         self.btn_pause.clicked.connect(self._on_pause)
         self.btn_run.clicked.connect(self._on_run)
-        self.slider_dt.valueChanged.connect(self._on_dt)
+        # dt writes are coalesced: at most one ctrl write per 50 ms while dragging,
+        # always carrying the slider's latest value
+        self._dt_timer = QTimer(self)
+        self._dt_timer.setSingleShot(True)
+        self._dt_timer.setInterval(50)
+        self._dt_timer.timeout.connect(lambda: self._on_dt(self.slider_dt.value()))
+        self.slider_dt.valueChanged.connect(self._schedule_dt)
         self.cmb_cam.currentIndexChanged.connect(self._on_cam_changed)
 
         self.splat_radius = 1
@@ -72,7 +274,14 @@ class Viewport(QWidget):
         self.slider_radius.valueChanged.connect(self._on_radius_changed)
 
         # runtime
-        self._view_keepalive = None
+        self._transform = None
+        self._transform_key = None  # (geometry seq, W, H) the cached transform belongs to
+        self._bufs = []          # pooled front/back (H, W) RGBX8888 framebuffers
+        self._qimgs = []         # QImages sharing _bufs' memory
+        self._back = 0           # index of the buffer the next splat paints into
+        self._splat_busy = False
+        self._splat_token = 0    # bumped when buffers or camera change; stale results are dropped
+        self._last_paint_key = None  # (fseq, gseq, radius) last shown
         self._fb = None
         self._geom = None
         self._cams_meta = []  # [{name, index, count, width, height}, ...]
@@ -117,13 +326,10 @@ class Viewport(QWidget):
                 pass
 
     def _release_current_buffers(self):
-        # drop any exported pointers
-        self._view_keepalive = None
+        # The viewport holds no SHM views between ticks (_tick copies the points out for the
+        # splat worker), so only the canvas image needs dropping; _delayed_close still
+        # retries if a late BufferError turns up
         self.canvas.clear()
-        try:
-            import gc; gc.collect()
-        except Exception:
-            pass
 
     def _open_camera_by_index(self, idx: int):
         old_fb   = getattr(self, "_fb", None)
@@ -165,6 +371,10 @@ class Viewport(QWidget):
         self._fb = FrameShmReader(fb_name);   self._fb.connect()
         self._geom = GeoShmReader(geom_name); self._geom.connect()
 
+        self._transform_key = None
+        self._last_paint_key = None
+        self._splat_token += 1
+
         self._active_idx = idx
         print(f"Opened camera #{idx}: {self._fb.width}x{self._fb.height} stride={self._fb.stride}, geom N={self._geom.count}")
 
@@ -196,6 +406,10 @@ class Viewport(QWidget):
         self.ctrl.pause = 0
         self.ctrl.write()
 
+    def _schedule_dt(self):
+        if not self._dt_timer.isActive():
+            self._dt_timer.start()
+
     def _on_dt(self, v):
         if not self._connected: return
         self.ctrl.dt_scale = v / 100.0
@@ -206,156 +420,73 @@ class Viewport(QWidget):
         if not self._fb or not self._geom:
             return
 
-        xy_view, meta, gseq = self._geom.latest_fast()
-        if xy_view is None:
+        xy, meta, gseq = self._geom.latest_xy_fast()
+        if xy is None:
             return
         count = meta["count"]
         W = max(1, int(meta.get("width",  self._geom.width or 192)))
         H = max(1, int(meta.get("height", self._geom.height or 96)))
 
-        view, fseq = self._fb.latest_frame_view_fast()
-        if view is None:
+        rgb, fseq = self._fb.latest_rgb_fast(count)
+        if rgb is None:
             return
-        if len(view) < count * 3:
+
+        # nothing new since the last paint (same data and radius): skip it; resizes
+        # are handled by the canvas repainting the image it already has
+        paint_key = (fseq, gseq, self.splat_radius)
+        if paint_key == self._last_paint_key:
             return
 
-        # Build a tight RGB888 (W x H) from scatter
-        img = QImage(W, H, QImage.Format.Format_RGB888)
-        img.fill(0)
-        ptr = img.bits()
-        ptr.setsize(W * H * 3)
-        outbuf = bytearray(W * H * 3)
-        buf = memoryview(outbuf)
-
-        # Interpret xy_view (float32 pairs)
-        mvf = memoryview(xy_view).cast("f")
-        # Determine if xy are already in pixel space
-        xs = mvf[0::2]; ys = mvf[1::2]
-        minx, maxx = min(xs), max(xs)
-        miny, maxy = min(ys), max(ys)
-        pixel_space = (
-            minx >= -0.5 and maxx <= (W - 1 + 0.5) and
-            miny >= -0.5 and maxy <= (H - 1 + 0.5)
-        )
-
-        r = int(self.splat_radius)
-
-        if pixel_space:
-            # Direct pixel-space splat
-            for i in range(count):
-                x = mvf[2*i]; y = mvf[2*i + 1]
-                ix = int(round(x))
-                iy = int(round((H - 1) - y))
-                if 0 <= ix < W and 0 <= iy < H:
-                    p = i * 3
-                    R = view[p+0]; G = view[p+1]; B = view[p+2]
-                    x0 = max(0, ix - r); x1 = min(W - 1, ix + r)
-                    y0 = max(0, iy - r); y1 = min(H - 1, iy + r)
-                    for yy in range(y0, y1 + 1):
-                        row_o = (yy * W) * 3
-                        for xx in range(x0, x1 + 1):
-                            o = row_o + xx * 3
-                            buf[o+0] = R; buf[o+1] = G; buf[o+2] = B
-        else:
-            # Normalize world coords to framebuffer space, then splat
-            dx = max(maxx - minx, 1e-6)
-            dy = max(maxy - miny, 1e-6)
-            for i in range(count):
-                x = mvf[2*i]; y = mvf[2*i + 1]
-                nx = (x - minx) / dx
-                ny = (y - miny) / dy
-                ix = int(nx * (W - 1) + 0.5)
-                iy = int((1.0 - ny) * (H - 1) + 0.5)
-                if 0 <= ix < W and 0 <= iy < H:
-                    p = i * 3
-                    R = view[p+0]; G = view[p+1]; B = view[p+2]
-                    x0 = max(0, ix - r); x1 = min(W - 1, ix + r)
-                    y0 = max(0, iy - r); y1 = min(H - 1, iy + r)
-                    for yy in range(y0, y1 + 1):
-                        row_o = (yy * W) * 3
-                        for xx in range(x0, x1 + 1):
-                            o = row_o + xx * 3
-                            buf[o+0] = R; buf[o+1] = G; buf[o+2] = B
-
-        # Build QImage
-        img = QImage(bytes(outbuf), W, H, QImage.Format.Format_RGB888)
-
-        # nearest-neighbor upscale to fit canvas
-        pix = QPixmap.fromImage(img).scaled(
-            self.canvas.size(),
-            Qt.AspectRatioMode.KeepAspectRatio,
-            Qt.TransformationMode.SmoothTransformation # FastTransformation for nearest
-        )
-        self._view_keepalive = view  # keep SHM mv alive
-        self.canvas.setPixmap(pix)
-
-    def _draw_scatter(self, xy, rgb_view, target_size):
-        """Render XY (+Y up) with interleaved RGB888 to a QImage that fits the canvas."""
-
-        W = target_size.width()
-        H = target_size.height()
-        if W < 2 or H < 2:
-            W, H = 640, 360  # fallback; will be replaced as soon as the widget lays out
+        if count == 0:
+            return
+        # one frame in flight at a time; while the worker is busy, frames are dropped
+        # (the paint key is left alone, so the next tick picks up the newest data)
+        if self._splat_busy:
+            return
 
-        try:
-            N_xy = len(xy)
-        except Exception:
-            return None
-        if N_xy <= 0:
-            return None
-
-        rgb = memoryview(rgb_view)
-        N_rgb = len(rgb) // 3
-        N = min(N_xy, N_rgb)
-        if N == 0:
-            return None
-
-        def _get_xy(i):
-            p = xy[i]
-            if isinstance(p, (tuple, list)) and len(p) >= 2:
-                return float(p[0]), float(p[1])
-            try:
-                return float(p[0]), float(p[1])
-            except Exception:
-                pass
-            for a, b in (("x", "y"), ("X", "Y")):
-                if hasattr(p, a) and hasattr(p, b):
-                    return float(getattr(p, a)), float(getattr(p, b))
-            raise TypeError("Unsupported XY element type")
-
-        import math
-        minx = math.inf; maxx = -math.inf
-        miny = math.inf; maxy = -math.inf
-        for i in range(N):
-            x, y = _get_xy(i)
-            if x < minx: minx = x
-            if x > maxx: maxx = x
-            if y < miny: miny = y
-            if y > maxy: maxy = y
-        dx = max(1e-6, maxx - minx)
-        dy = max(1e-6, maxy - miny)
-
-        buf = bytearray(W * H * 3)
-
-        mv = memoryview(buf)
-
-        for i in range(N):
-            x, y = _get_xy(i)
-            nx = (x - minx) / dx
-            ny = (y - miny) / dy
-            ix = int(nx * (W - 1) + 0.5)
-            iy = int((1.0 - ny) * (H - 1) + 0.5)
-            if 0 <= ix < W and 0 <= iy < H:
-                o = (iy * W + ix) * 3
-                b = i * 3
-                mv[o + 0] = rgb[b + 0]  # R
-                mv[o + 1] = rgb[b + 1]  # G
-                mv[o + 2] = rgb[b + 2]  # B
-
-        from PyQt6.QtGui import QImage
-        img = QImage(bytes(buf), W, H, QImage.Format.Format_RGB888)
-        self._img_keepalive = buf  # keep Python buffer alive in case of platform differences
-        return img
+        # Copy the points out of SHM (small next to the image) for the worker; the
+        # readers hand out cached array views, so there is no per-frame frombuffer
+        xy = xy.copy()
+        rgb = rgb.copy()
+
+        # the fit only moves when the geometry does; rescan only on a new geometry seq
+        key = (gseq, W, H)
+        if key != self._transform_key:
+            self._transform = splat_transform(xy, W, H, self._geom.coord_space)
+            self._transform_key = key
+
+        # two pooled RGBX8888 framebuffers (and the QImages wrapping them) per frame size:
+        # the canvas shows the front one while the worker paints the back one
+        if not self._bufs or self._bufs[0].shape != (H, W):
+            self.canvas.clear()  # the canvas must not hold an image over the old buffers
+            self._splat_token += 1
+            self._bufs = [np.empty((H, W), dtype=np.uint32) for _ in range(2)]
+            # non-owning: each QImage reads its buffer in place, no bytes() copy on hand-off
+            self._qimgs = [QImage(b.data, W, H, b.strides[0], QImage.Format.Format_RGBX8888)
+                           for b in self._bufs]
+            self._back = 0
+
+        worker = SplatWorker(self._splat_token, self._back, self._bufs[self._back],
+                             xy, rgb, int(self.splat_radius), self._transform)
+        worker.signals.finished.connect(self._on_splat_finished)
+        worker.signals.failed.connect(self._on_splat_failed)
+        self._splat_busy = True
+        self._last_paint_key = paint_key
+        QThreadPool.globalInstance().start(worker)
+
+    def _on_splat_failed(self, token, message):
+        # free the slot so the next tick retries instead of the viewport freezing
+        self._splat_busy = False
+        self._last_paint_key = None
+        print(f"Splat failed: {message}")
+
+    def _on_splat_finished(self, token, index):
+        self._splat_busy = False
+        if token != self._splat_token:
+            return  # painted into buffers that were replaced (resize / camera switch)
+        # the canvas draws it scaled (nearest-neighbor) at paint time
+        self.canvas.set_image(self._qimgs[index])
+        self._back = 1 - index
 
     def closeEvent(self, e):
         try:
@@ -0,0 +1,43 @@
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("PyQt6.QtWidgets")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "src"))
+
+from ui.camera_importer import load_camera_coords
+
+
+def _legacy_coords(path):
+    # the original per-line parser this replaced
+    x_coords, y_coords = [], []
+    with open(path, 'r') as infile:
+        for line in infile.read().splitlines():
+            parts = line.split(",")
+            if len(parts) >= 3:
+                x_coords.append(float(parts[1]))
+                y_coords.append(float(parts[2]))
+    return list(zip(x_coords, y_coords))
+
+
+def test_rows_match_legacy_parser(tmp_path):
+    csv = tmp_path / "cam.csv"
+    csv.write_text(
+        "D1,1.25,2.5,extra\n"
+        "#R1,1.0,2.0\n"
+        "\n"
+        "short,3\n"
+        "note\n"
+        "D#2, -3.5 ,4\n"
+    )
+    coords = load_camera_coords(str(csv))
+    expected = _legacy_coords(str(csv))
+    assert len(coords) == len(expected) == 3
+    assert [tuple(row) for row in coords.tolist()] == expected
+
+
+def test_no_valid_rows(tmp_path):
+    csv = tmp_path / "cam.csv"
+    csv.write_text("\nheader only\n")
+    assert load_camera_coords(str(csv)).shape == (0, 2)